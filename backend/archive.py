@@ -0,0 +1,138 @@
+# backend/archive.py
+# Moves cold rows out of the hot tables: completed and expired tasks (with
+# all their swaps and reviews) and settled swaps, once they are older than the
+# configured age. Each batch is copied with INSERT .. SELECT and deleted in
+# one short transaction.
+# Runs from `flask archive` (e.g. nightly from cron) or, with ARCHIVE_INTERVAL
+# set, on each worker's background thread.
+from datetime import datetime, timedelta
+import logging
+import os
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import select, insert, delete
+
+import background
+from extensions import db
+from models import (
+    Task, SwapRequest, Review,
+    TaskArchive, SwapRequestArchive, ReviewArchive,
+)
+
+SETTLED = ('accepted', 'rejected', 'expired')
+FINISHED = ('completed', 'expired')
+
+logger = logging.getLogger(__name__)
+
+
+def _copy(source, target, condition, now):
+    columns = [c.name for c in source.__table__.columns]
+    rows = select(*[source.__table__.c[name] for name in columns],
+                  db.literal(now).label('archived_at')).where(condition)
+    db.session.execute(insert(target).from_select(columns + ['archived_at'], rows))
+
+
+def archive_tasks(older_than, batch_size=1000):
+    """Archive completed/expired tasks last updated before ``older_than``."""
+    moved = 0
+    while True:
+        ids = db.session.scalars(
+            select(Task.id)
+            .where(Task.status.in_(FINISHED), Task.updated_at < older_than)
+            .order_by(Task.id).limit(batch_size).with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            return moved
+        now = datetime.utcnow()
+        _copy(Task, TaskArchive, Task.id.in_(ids), now)
+        _copy(SwapRequest, SwapRequestArchive, SwapRequest.task_id.in_(ids), now)
+        _copy(Review, ReviewArchive, Review.task_id.in_(ids), now)
+        # Swaps and reviews follow through ON DELETE CASCADE
+        db.session.execute(delete(Task).where(Task.id.in_(ids)))
+        db.session.commit()
+        moved += len(ids)
+
+
+def archive_swaps(older_than, batch_size=1000):
+    """Archive accepted/rejected/expired swaps created before ``older_than``."""
+    moved = 0
+    while True:
+        ids = db.session.scalars(
+            select(SwapRequest.id)
+            .where(SwapRequest.status.in_(SETTLED), SwapRequest.created_at < older_than)
+            .order_by(SwapRequest.id).limit(batch_size).with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            return moved
+        _copy(SwapRequest, SwapRequestArchive, SwapRequest.id.in_(ids), datetime.utcnow())
+        db.session.execute(delete(SwapRequest).where(SwapRequest.id.in_(ids)))
+        db.session.commit()
+        moved += len(ids)
+
+
+def archive(days, batch_size=1000):
+    """Run both passes. Returns (tasks moved, swaps moved)."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    tasks = archive_tasks(cutoff, batch_size)
+    return tasks, archive_swaps(cutoff, batch_size)
+
+
+def archive_from_config():
+    config = current_app.config
+    return archive(config['ARCHIVE_AFTER_DAYS'], config['ARCHIVE_BATCH_SIZE'])
+
+
+# -----------------------------
+# In-process schedule
+# -----------------------------
+_started_pid = None
+_lock = threading.Lock()
+
+
+def _schedule(app, interval):
+    while True:
+        time.sleep(interval)
+        future = background.submit(app, archive_from_config)
+        try:
+            tasks, swaps = future.result()
+        except Exception:
+            continue  # already logged by background.submit
+        if tasks or swaps:
+            logger.info('Archived %d tasks and %d swaps', tasks, swaps)
+
+
+def start(app):
+    """Start this process's archive timer if it isn't running yet. Called on
+    each request when ARCHIVE_INTERVAL is set, like the sweeper's timer."""
+    global _started_pid
+    if _started_pid == os.getpid():
+        return
+    with _lock:
+        if _started_pid == os.getpid():
+            return
+        _started_pid = os.getpid()
+        threading.Thread(target=_schedule, args=(app, app.config['ARCHIVE_INTERVAL']),
+                         name='archiver', daemon=True).start()
+
+
+def init_app(app):
+    if not app.config['ARCHIVE_INTERVAL']:
+        return
+
+    @app.before_request
+    def _start_archiver():
+        start(app)
+
+
+# -----------------------------
+# Reads
+# -----------------------------
+def include_archived(args):
+    return args.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+
+def find_task(task_id):
+    """Task by id, falling back to the archive. None if neither has it."""
+    return db.session.get(Task, task_id) or db.session.get(TaskArchive, task_id)
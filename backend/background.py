@@ -0,0 +1,31 @@
+# backend/background.py
+# Minimal in-process job runner. The executor is created lazily, so each
+# forked worker gets its own thread rather than a dead copy of the master's.
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='background')
+        return _executor
+
+
+def submit(app, fn, *args, **kwargs):
+    """Run ``fn`` on the background thread inside an app context."""
+    def run():
+        with app.app_context():
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                logger.exception('Background job %s failed', fn.__name__)
+                raise
+    return _get_executor().submit(run)
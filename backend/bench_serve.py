@@ -0,0 +1,148 @@
+# backend/bench_serve.py
+# Requests/sec of `flask serve` against the development server.
+#
+#   python bench_serve.py [--seconds 10] [--clients 8] [--workers 2] [--threads 4]
+#
+# Each server runs on a throwaway SQLite database holding one user and a
+# page of tasks; keep-alive clients then hit GET /tasks for the given time.
+# Nothing here touches DATABASE_URL's database.
+from datetime import datetime
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _seed(env):
+    code = (
+        "from werkzeug.security import generate_password_hash\n"
+        "from app import create_app\n"
+        "from extensions import db\n"
+        "from models import User, Task\n"
+        "app = create_app()\n"
+        "with app.app_context():\n"
+        "    db.create_all()\n"
+        "    db.session.add(User(name='bench', email='bench@example.com', role='user',\n"
+        "                        password_hash=generate_password_hash('bench')))\n"
+        "    db.session.commit()\n"
+        "    db.session.add_all([Task(title=f'task {i}', description='', created_by=1)\n"
+        "                        for i in range(20)])\n"
+        "    db.session.commit()\n"
+    )
+    subprocess.run([sys.executable, '-c', code], cwd=HERE, env=env, check=True)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _request(port, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def _wait(port, deadline=30):
+    start = time.monotonic()
+    while time.monotonic() - start < deadline:
+        try:
+            _request(port, 'GET', '/')
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not come up')
+
+
+def _load(port, token, seconds, clients):
+    headers = {'Authorization': f'Bearer {token}'}
+    statuses = {}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        counts = {}
+        while time.monotonic() < stop:
+            connection.request('GET', '/tasks', headers=headers)
+            response = connection.getresponse()
+            response.read()
+            counts[response.status] = counts.get(response.status, 0) + 1
+            if response.getheader('Connection', '').lower() == 'close':
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        with lock:
+            for status, n in counts.items():
+                statuses[status] = statuses.get(status, 0) + n
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+def bench(name, command, env, port, seconds, clients):
+    server = subprocess.Popen(command, cwd=HERE, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait(port)
+        status, body = _request(port, 'POST', '/login', json.dumps(
+            {'email': 'bench@example.com', 'password': 'bench'}),
+            {'Content-Type': 'application/json'})
+        if status != 200:
+            raise RuntimeError(f'{name}: login failed with {status}')
+        statuses = _load(port, json.loads(body)['access_token'], seconds, clients)
+    finally:
+        server.terminate()
+        server.wait()
+    ok = statuses.get(200, 0)
+    others = ', '.join(f'{n} x {s}' for s, n in sorted(statuses.items()) if s != 200)
+    print(f'{name:<16} {ok / seconds:8.0f} req/s' + (f'  ({others})' if others else ''))
+
+
+def _run(args, env):
+    print(f'{datetime.utcnow():%Y-%m-%d %H:%M} UTC, {os.cpu_count()} CPUs, '
+          f'{args.clients} clients, GET /tasks for {args.seconds:g}s each')
+    port = _free_port()
+    bench('flask run', [sys.executable, '-m', 'flask', 'run', '--port', str(port)],
+          env, port, args.seconds, args.clients)
+    port = _free_port()
+    bench(f'flask serve {args.workers}x{args.threads}',
+          [sys.executable, '-m', 'flask', 'serve', '--bind', f'127.0.0.1:{port}',
+           '--workers', str(args.workers), '--threads', str(args.threads)],
+          env, port, args.seconds, args.clients)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='bench-')
+    env = dict(os.environ, FLASK_APP='wsgi',
+               DATABASE_URL=f'sqlite:///{os.path.join(directory, "bench.db")}')
+    try:
+        _seed(env)
+        _run(args, env)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+# backend/changes.py
+# Append-only change log for delta sync. Entries are collected as the session
+# flushes and written just before it commits, in the same transaction, so
+# they commit (or roll back) together with the change they describe.
+#
+# Writing them at commit rather than at flush matters: the id is the client's
+# cursor, and a transaction that took its ids at flush and then ran on for a
+# while would commit them below a cursor a client had already moved past.
+# Taken at commit, ids become visible in order give or take the commit
+# itself, which the CHANGES_SETTLE_SECONDS window covers.
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, insert, select, delete
+from sqlalchemy.orm import attributes
+
+from extensions import db
+from models import Task, SwapRequest, Review, ChangeLog, ChangeAudience
+
+ENTITIES = {Task: 'task', SwapRequest: 'swap', Review: 'review'}
+
+
+def _previous(obj, attr):
+    history = attributes.get_history(obj, attr)
+    return history.deleted[0] if history.deleted else None
+
+
+def _audience(obj):
+    """User ids that may see a change to ``obj``."""
+    if isinstance(obj, Task):
+        users = {obj.created_by, obj.assigned_to, _previous(obj, 'assigned_to')}
+    elif isinstance(obj, SwapRequest):
+        users = {obj.requester_id, obj.owner_id}
+    else:
+        users = {obj.reviewer_id, obj.reviewee_id}
+    users.discard(None)
+    return users
+
+
+def _collect(session):
+    for op, objects in (('insert', session.new),
+                        ('update', session.dirty),
+                        ('delete', session.deleted)):
+        for obj in objects:
+            entity = ENTITIES.get(type(obj))
+            if entity is None:
+                continue
+            if op == 'update' and not session.is_modified(obj, include_collections=False):
+                continue
+            yield entity, obj, op
+
+
+def record(session, entries):
+    """Queue ``(entity, entity_id, op, user_ids)`` entries for the log; they
+    are written when ``session`` commits and dropped if it rolls back."""
+    session.info.setdefault('change_entries', []).extend(entries)
+
+
+def _write(connection, entries):
+    # One multi-row INSERT .. RETURNING for the entries and one for their
+    # audience, however large the batch.
+    now = datetime.utcnow()
+    change_ids = connection.execute(
+        insert(ChangeLog).returning(ChangeLog.id, sort_by_parameter_order=True),
+        [dict(entity=entity, entity_id=entity_id, op=op, created_at=now)
+         for entity, entity_id, op, _ in entries]
+    ).scalars().all()
+    audience = [{'user_id': user_id, 'change_id': change_id}
+                for change_id, (_, _, _, users) in zip(change_ids, entries)
+                for user_id in users if user_id is not None]
+    if audience:
+        connection.execute(insert(ChangeAudience), audience)
+
+
+def cascaded_deletes(connection, task_ids):
+    """Entries for the swaps and reviews the database will cascade-delete
+    along with ``task_ids``. Must run before the tasks are deleted."""
+    if not task_ids:
+        return []
+    swaps = connection.execute(
+        select(SwapRequest.id, SwapRequest.requester_id, SwapRequest.owner_id)
+        .where(SwapRequest.task_id.in_(task_ids))
+    )
+    reviews = connection.execute(
+        select(Review.id, Review.reviewer_id, Review.reviewee_id)
+        .where(Review.task_id.in_(task_ids))
+    )
+    return [('swap', id_, 'delete', {a, b}) for id_, a, b in swaps] + \
+        [('review', id_, 'delete', {a, b}) for id_, a, b in reviews]
+
+
+@event.listens_for(db.session, 'before_flush')
+def collect_cascades(session, flush_context, instances):
+    # Task children are removed by ON DELETE CASCADE without being loaded,
+    # so note them while they still exist.
+    task_ids = [obj.id for obj in session.deleted if isinstance(obj, Task)]
+    if task_ids:
+        session.info.setdefault('cascaded_deletes', []).extend(
+            cascaded_deletes(session.connection(), task_ids))
+
+
+@event.listens_for(db.session, 'after_flush')
+def record_changes(session, flush_context):
+    entries = [(entity, obj.id, op, _audience(obj))
+               for entity, obj, op in _collect(session)]
+    seen = {(entity, entity_id) for entity, entity_id, op, _ in entries if op == 'delete'}
+    entries.extend(entry for entry in session.info.pop('cascaded_deletes', [])
+                   if (entry[0], entry[1]) not in seen)
+    if entries:
+        record(session, entries)
+
+
+@event.listens_for(db.session, 'before_commit')
+def write_changes(session):
+    # before_commit runs ahead of the final flush; flush now so its entries
+    # are written with the rest.
+    session.flush()
+    entries = session.info.pop('change_entries', None)
+    if entries:
+        _write(session.connection(), entries)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_changes(session):
+    session.info.pop('cascaded_deletes', None)
+    session.info.pop('change_entries', None)
+
+
+# -----------------------------
+# Reading the feed
+# -----------------------------
+def changes_since(since, user=None, compact=False, limit=500, settle=0):
+    """Entries after cursor ``since`` visible to ``user`` (None = everything).
+
+    Entries younger than ``settle`` seconds are held back: ids are handed out
+    just before commit, so a commit that stalls can still land a lower id
+    after a faster one, and a client that already moved past it would miss it.
+    """
+    query = select(ChangeLog).where(ChangeLog.id > since)
+    if user is not None:
+        query = query.join(ChangeAudience, ChangeAudience.change_id == ChangeLog.id) \
+            .where(ChangeAudience.user_id == user.id)
+    if settle:
+        query = query.where(ChangeLog.created_at <= datetime.utcnow() - timedelta(seconds=settle))
+
+    if compact:
+        # Keep only the newest entry per entity
+        latest = query.with_only_columns(func.max(ChangeLog.id).label('id')) \
+            .group_by(ChangeLog.entity, ChangeLog.entity_id).subquery()
+        query = select(ChangeLog).join(latest, latest.c.id == ChangeLog.id)
+
+    return db.session.scalars(query.order_by(ChangeLog.id).limit(limit)).all()
+
+
+def head(settle=0):
+    """Cursor to bootstrap a client from: the newest entry that has settled,
+    so nothing at or below it can still be committed later."""
+    cutoff = datetime.utcnow() - timedelta(seconds=settle)
+    # Walks the primary key back from the end, past the few unsettled entries
+    newest = db.session.scalar(
+        select(ChangeLog.id).where(ChangeLog.created_at <= cutoff)
+        .order_by(ChangeLog.id.desc()).limit(1))
+    if newest is not None:
+        return newest
+    # Nothing settled yet: start just before whatever is left in the log
+    oldest = oldest_cursor()
+    return oldest - 1 if oldest is not None else 0
+
+
+def oldest_cursor():
+    return db.session.scalar(select(func.min(ChangeLog.id)))
+
+
+def prune(older_than, batch_size=5000):
+    """Delete log entries created before ``older_than``, in batches.
+
+    The newest entry is always kept so the head cursor never moves back.
+    """
+    head = db.session.scalar(select(func.max(ChangeLog.id)))
+    if head is None:
+        return 0
+    removed = 0
+    while True:
+        ids = db.session.scalars(
+            select(ChangeLog.id)
+            .where(ChangeLog.created_at < older_than, ChangeLog.id < head)
+            .order_by(ChangeLog.id).limit(batch_size)
+        ).all()
+        if not ids:
+            return removed
+        db.session.execute(delete(ChangeAudience).where(ChangeAudience.change_id.in_(ids)))
+        db.session.execute(delete(ChangeLog).where(ChangeLog.id.in_(ids)))
+        db.session.commit()
+        removed += len(ids)
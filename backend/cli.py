@@ -0,0 +1,190 @@
+# backend/cli.py
+from datetime import datetime, timedelta
+
+import click
+
+from extensions import db
+
+
+def _dispose_engines(app):
+    # Pooled connections opened in the master must not be shared with the
+    # forked children; close=False leaves the parent's sockets alone and
+    # just gives this process a fresh pool.
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def _post_fork(app):
+    _dispose_engines(app)
+    # Only server workers publish metrics snapshots for each other
+    app.extensions['metrics'].start_worker(app)
+
+
+def register_commands(app):
+    @app.cli.command('serve')
+    @click.option('--bind', '-b', default='0.0.0.0:5000', show_default=True)
+    @click.option('--workers', '-w', default=2, show_default=True,
+                  help='Number of preforked worker processes.')
+    @click.option('--threads', '-t', default=4, show_default=True,
+                  help='Threads per worker.')
+    @click.option('--max-requests', default=10000, show_default=True,
+                  help='Recycle a worker after this many requests (0 disables).')
+    @click.option('--max-requests-jitter', default=500, show_default=True)
+    @click.option('--timeout', default=30, show_default=True)
+    @click.option('--graceful-timeout', default=30, show_default=True)
+    def serve(bind, workers, threads, max_requests, max_requests_jitter,
+              timeout, graceful_timeout):
+        """Run the app under a preforking gunicorn server.
+
+        The app is built once in the master and inherited by every worker.
+        SIGHUP to the master replaces the workers gracefully, but they fork
+        from the same preloaded app, so new code is not picked up. To deploy
+        new code, restart the server, or send USR2 to start a new master
+        alongside the old one and then TERM the old master.
+        """
+        from gunicorn.app.base import BaseApplication
+
+        # Counters restart with the server; drop the last run's worker snapshots
+        app.extensions['metrics'].reset()
+        # Admission control sizes its thresholds from these
+        app.config['SERVE_WORKERS'] = workers
+        app.config['SERVE_THREADS'] = threads
+
+        options = {
+            'bind': bind,
+            'workers': workers,
+            'threads': threads,
+            'worker_class': 'gthread' if threads > 1 else 'sync',
+            'max_requests': max_requests,
+            'max_requests_jitter': max_requests_jitter,
+            'timeout': timeout,
+            'graceful_timeout': graceful_timeout,
+            'preload_app': True,
+            'post_fork': lambda server, worker: _post_fork(app),
+        }
+
+        class Server(BaseApplication):
+            def load_config(self):
+                for key, value in options.items():
+                    self.cfg.set(key, value)
+
+            def load(self):
+                return app
+
+        Server().run()
+
+    @app.cli.command('prune-changes')
+    @click.option('--days', type=int, default=None,
+                  help='Retention in days (default: CHANGES_RETENTION_DAYS).')
+    def prune_changes(days):
+        """Delete change-feed entries older than the retention window."""
+        from changes import prune
+
+        days = days if days is not None else app.config['CHANGES_RETENTION_DAYS']
+        removed = prune(datetime.utcnow() - timedelta(days=days))
+        click.echo(f'Pruned {removed} change log entries')
+
+    @app.cli.command('prune-idempotency-keys')
+    def prune_idempotency_keys():
+        """Delete expired Idempotency-Key records."""
+        from idempotency import prune
+
+        click.echo(f'Pruned {prune()} idempotency keys')
+
+    @app.cli.command('purge-deleted')
+    @click.option('--chunk-size', default=500, show_default=True)
+    def purge_deleted(chunk_size):
+        """Remove tombstoned users and their tasks, swaps and reviews."""
+        from deletion import purge_deleted
+
+        click.echo(f'Purged {purge_deleted(chunk_size)} users')
+
+    @app.cli.command('backfill-rollups')
+    @click.option('--metric', 'metrics', multiple=True,
+                  help='Metric to rebuild (repeatable, default: all).')
+    def backfill_rollups(metrics):
+        """Rebuild the hourly/daily activity rollups from existing rows."""
+        from rollups import backfill, METRICS
+
+        backfill(metrics or METRICS)
+        click.echo('Rollups rebuilt')
+
+    @app.cli.command('sweep')
+    @click.option('--dry-run', is_flag=True, help='Only count what would be expired.')
+    def sweep_command(dry_run):
+        """Expire stale pending swaps and idle open tasks (SWEEP_* settings)."""
+        from sweeper import sweep_from_config
+
+        counts = sweep_from_config(dry_run=dry_run)
+        verb = 'Would expire' if dry_run else 'Expired'
+        for policy, count in counts.items():
+            click.echo(f'{verb} {count} ({policy})')
+
+    @app.cli.command('rebuild-facets')
+    def rebuild_facets():
+        """Recompute the browse facet counts from the task table."""
+        from facets import rebuild
+
+        rebuild()
+        click.echo('Facet counts rebuilt')
+
+    @app.cli.command('fold-facets')
+    def fold_facets():
+        """Add pending facet count deltas into the counts table."""
+        from facets import fold
+
+        fold()
+        click.echo('Facet deltas folded')
+
+    @app.cli.command('fold-rollups')
+    def fold_rollups():
+        """Add pending activity rollup deltas into the rollups table."""
+        from rollups import fold
+
+        fold()
+        click.echo('Rollup deltas folded')
+
+    @app.cli.command('snapshot')
+    @click.option('--out', 'directory', required=True, type=click.Path(file_okay=False),
+                  help='Directory for the table files and manifest.json.')
+    @click.option('--since', type=click.DateTime(), default=None,
+                  help='Only rows created/updated at or after this UTC time '
+                       '(the "until" of the previous manifest).')
+    @click.option('--format', 'fmt', type=click.Choice(['parquet', 'arrow', 'ndjson']),
+                  default=None, help='Default: parquet if pyarrow is installed, else ndjson.')
+    @click.option('--table', 'tables', multiple=True,
+                  type=click.Choice(['users', 'tasks', 'swaps', 'reviews']),
+                  help='Table to export (repeatable, default: all).')
+    @click.option('--include-archived', is_flag=True,
+                  help='Also export archived tasks, swaps and reviews.')
+    @click.option('--batch-size', type=int, default=None)
+    def snapshot_command(directory, since, fmt, tables, include_archived, batch_size):
+        """Write a columnar (or NDJSON) snapshot of users, tasks, swaps and reviews."""
+        import snapshot
+
+        if fmt and not snapshot.available(fmt):
+            raise click.UsageError(f'{fmt} needs pyarrow; install it or use --format ndjson')
+        manifest = snapshot.export(
+            directory, fmt, since=since,
+            until=snapshot.window_end(app.config['SNAPSHOT_SETTLE_SECONDS']),
+            batch_size=batch_size or app.config['SNAPSHOT_BATCH_SIZE'],
+            include_archived=include_archived, tables=tables or None,
+        )
+        for name, table in manifest['tables'].items():
+            click.echo(f"{name}: {table['rows']} rows -> {table['file']}")
+        click.echo(f"Snapshot up to {manifest['until']} ({manifest['format']})")
+
+    @app.cli.command('archive')
+    @click.option('--days', type=int, default=None,
+                  help='Minimum age in days (default: ARCHIVE_AFTER_DAYS).')
+    @click.option('--batch-size', type=int, default=None)
+    def archive_command(days, batch_size):
+        """Move old completed tasks and settled swaps to the archive tables."""
+        from archive import archive
+
+        tasks, swaps = archive(
+            days if days is not None else app.config['ARCHIVE_AFTER_DAYS'],
+            batch_size or app.config['ARCHIVE_BATCH_SIZE'],
+        )
+        click.echo(f'Archived {tasks} tasks and {swaps} swaps')
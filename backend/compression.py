@@ -0,0 +1,220 @@
+# backend/compression.py
+import threading
+import time
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+
+COMPRESSIBLE_MIMETYPES = (
+    'application/json',
+    'text/csv',
+    'text/plain',
+    'text/html',
+    'application/x-ndjson',
+)
+
+
+# -----------------------------
+# Per-route level override
+# -----------------------------
+def compress_level(level):
+    """Override the compression level for one view. ``0`` disables it."""
+    def decorator(fn):
+        fn._compress_level = level
+        return fn
+    return decorator
+
+
+# -----------------------------
+# Encoders
+# -----------------------------
+class _ZlibEncoder:
+    def __init__(self, level, wbits):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, chunk):
+        return self._obj.compress(chunk)
+
+    def finish(self):
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, level):
+        self._obj = brotli.Compressor(quality=min(level, 11))
+
+    def compress(self, chunk):
+        return self._obj.process(chunk)
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk):
+        return self._obj.compress(chunk)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+def _encoders():
+    encoders = {
+        'gzip': lambda level: _ZlibEncoder(level, 16 + zlib.MAX_WBITS),
+        'deflate': lambda level: _ZlibEncoder(level, zlib.MAX_WBITS),
+    }
+    if brotli is not None:
+        encoders['br'] = _BrotliEncoder
+    if zstandard is not None:
+        encoders['zstd'] = _ZstdEncoder
+    return encoders
+
+
+# Server-side preference when the client weighs several encodings equally
+PREFERENCE = ('zstd', 'br', 'gzip', 'deflate')
+
+
+def negotiate(accept_encoding, available):
+    """Pick the best encoding from an ``Accept-Encoding`` header, or None."""
+    weights = {}
+    for part in (accept_encoding or '').split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for name in PREFERENCE:
+        if name not in available:
+            continue
+        q = weights.get(name, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+# -----------------------------
+# Extension
+# -----------------------------
+class Compress:
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.encoders = _encoders()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_MIMETYPES', COMPRESSIBLE_MIMETYPES)
+        app.extensions['compress'] = self
+        app.after_request(self._after_request)
+
+    def stats(self):
+        """Snapshot of per-encoding counters: responses, bytes in/out, cpu seconds."""
+        with self._lock:
+            return {name: dict(counters) for name, counters in self._stats.items()}
+
+    def _record(self, encoding, bytes_in, bytes_out, cpu, responses=0):
+        with self._lock:
+            counters = self._stats.setdefault(encoding, {
+                'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0
+            })
+            counters['responses'] += responses
+            counters['bytes_in'] += bytes_in
+            counters['bytes_out'] += bytes_out
+            counters['cpu_seconds'] += cpu
+
+    def _level_for(self, app):
+        view = app.view_functions.get(request.endpoint) if request.endpoint else None
+        return getattr(view, '_compress_level', app.config['COMPRESS_LEVEL'])
+
+    def _after_request(self, response):
+        app = current_app
+        if not app.config['COMPRESS_ENABLED']:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in app.config['COMPRESS_MIMETYPES']):
+            return response
+
+        level = self._level_for(app)
+        if not level:
+            return response
+
+        encoding = negotiate(request.headers.get('Accept-Encoding'), self.encoders)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            length = response.content_length
+            if length is not None and length < app.config['COMPRESS_MIN_SIZE']:
+                return response
+            response.response = self._stream(response.response, encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < app.config['COMPRESS_MIN_SIZE']:
+                return response
+            started = time.thread_time()
+            encoder = self.encoders[encoding](level)
+            compressed = encoder.compress(body) + encoder.finish()
+            self._record(encoding, len(body), len(compressed),
+                         time.thread_time() - started, responses=1)
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def _stream(self, chunks, encoding, level):
+        encoder = self.encoders[encoding](level)
+        bytes_in = bytes_out = 0
+        cpu = 0.0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                started = time.thread_time()
+                out = encoder.compress(chunk)
+                cpu += time.thread_time() - started
+                bytes_in += len(chunk)
+                if out:
+                    bytes_out += len(out)
+                    yield out
+            started = time.thread_time()
+            out = encoder.finish()
+            cpu += time.thread_time() - started
+            bytes_out += len(out)
+            if out:
+                yield out
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+            self._record(encoding, bytes_in, bytes_out, cpu, responses=1)
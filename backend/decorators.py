@@ -0,0 +1,37 @@
+# backend/decorators.py
+from functools import wraps
+
+from flask import jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from extensions import jwt
+from models import User
+
+
+# -----------------------------
+# Token identity: refuse tombstoned accounts
+# -----------------------------
+@jwt.user_lookup_loader
+def load_user(jwt_header, jwt_data):
+    # Runs on every verified token, so a deleted user's outstanding access
+    # and refresh tokens stop working at once rather than at expiry, and
+    # nothing new is written for them while the purge is running. Returning
+    # None makes flask-jwt-extended answer 401.
+    user = User.query.get(jwt_data['sub'])
+    if user is None or user.is_deleted():
+        return None
+    return user
+
+# -----------------------------
+# Helper: Admin decorator
+# -----------------------------
+def admin_required(fn):
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        if not user or not user.is_admin():
+            return jsonify({"error": "Admin access required"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
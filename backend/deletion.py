@@ -0,0 +1,85 @@
+# backend/deletion.py
+# Chunked purge of tombstoned users. Every chunk is its own short
+# transaction, so a large account never holds locks for long and an
+# interrupted purge just resumes where it stopped.
+from datetime import datetime
+
+from sqlalchemy import select, delete, update
+
+from changes import record, cascaded_deletes
+from extensions import db
+from models import User, Task, SwapRequest, Review
+from rollups import record_events, removed_events
+
+
+def tombstone(user):
+    """Hide ``user`` immediately; rows are removed later by purge_user."""
+    user.deleted_at = datetime.utcnow()
+    db.session.commit()
+
+
+def delete_tasks(task_ids):
+    """Delete tasks by id; swaps and reviews go via ON DELETE CASCADE."""
+    connection = db.session.connection()
+    tasks = connection.execute(
+        select(Task.id, Task.created_by, Task.assigned_to).where(Task.id.in_(task_ids))
+    ).all()
+    entries = cascaded_deletes(connection, task_ids)
+    entries += [('task', id_, 'delete', {a, b}) for id_, a, b in tasks]
+    record_events(connection, removed_events(connection, task_ids=task_ids))
+    connection.execute(delete(Task).where(Task.id.in_(task_ids)))
+    record(db.session, entries)
+
+
+def _chunks(query, chunk_size):
+    while True:
+        ids = db.session.scalars(query.limit(chunk_size)).all()
+        if not ids:
+            return
+        yield ids
+
+
+def purge_user(user_id, chunk_size=500):
+    """Remove a tombstoned user and everything that depends on it."""
+    for ids in _chunks(select(Task.id).where(Task.created_by == user_id), chunk_size):
+        delete_tasks(ids)
+        db.session.commit()
+
+    for ids in _chunks(select(Task.id).where(Task.assigned_to == user_id), chunk_size):
+        rows = db.session.execute(
+            select(Task.id, Task.created_by).where(Task.id.in_(ids))
+        ).all()
+        db.session.execute(update(Task).where(Task.id.in_(ids)).values(assigned_to=None))
+        record(db.session, [('task', id_, 'update', {owner, user_id}) for id_, owner in rows])
+        db.session.commit()
+
+    for ids in _chunks(select(SwapRequest.id).where(SwapRequest.requester_id == user_id), chunk_size):
+        rows = db.session.execute(
+            select(SwapRequest.id, SwapRequest.owner_id).where(SwapRequest.id.in_(ids))
+        ).all()
+        record_events(db.session.connection(), removed_events(db.session.connection(), swap_ids=ids))
+        db.session.execute(delete(SwapRequest).where(SwapRequest.id.in_(ids)))
+        record(db.session, [('swap', id_, 'delete', {owner, user_id}) for id_, owner in rows])
+        db.session.commit()
+
+    reviews = select(Review.id).where(
+        (Review.reviewer_id == user_id) | (Review.reviewee_id == user_id))
+    for ids in _chunks(reviews, chunk_size):
+        rows = db.session.execute(
+            select(Review.id, Review.reviewer_id, Review.reviewee_id).where(Review.id.in_(ids))
+        ).all()
+        record_events(db.session.connection(), removed_events(db.session.connection(), review_ids=ids))
+        db.session.execute(delete(Review).where(Review.id.in_(ids)))
+        record(db.session, [('review', id_, 'delete', {a, b}) for id_, a, b in rows])
+        db.session.commit()
+
+    db.session.execute(delete(User).where(User.id == user_id))
+    db.session.commit()
+
+
+def purge_deleted(chunk_size=500):
+    """Purge every tombstoned user. Returns how many were removed."""
+    user_ids = db.session.scalars(select(User.id).where(User.deleted_at.isnot(None))).all()
+    for user_id in user_ids:
+        purge_user(user_id, chunk_size)
+    return len(user_ids)
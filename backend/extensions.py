@@ -1,10 +1,43 @@
 # backend/extensions.py
+import sqlite3
+
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
+from flask import has_request_context, request
 from flask_jwt_extended import JWTManager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from compression import Compress
+from metrics import Metrics
+from profiling import Profiler
+from ratelimit import RateLimiter
+
+class _JWTManager(JWTManager):
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        # /batch verified the caller's token once; its sub-requests reuse the
+        # claims instead of checking the signature again. Type, freshness and
+        # the user lookup are still applied per route.
+        verified = request.environ.get('batch.jwt') if has_request_context() else None
+        if verified is not None and verified[0] == encoded_token:
+            return verified[1]
+        return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
 
 db = SQLAlchemy()
 migrate = Migrate()
 bcrypt = Bcrypt()
-jwt = JWTManager()
+jwt = _JWTManager()
+compress = Compress()
+limiter = RateLimiter()
+metrics = Metrics()
+profiler = Profiler()
+
+
+# SQLite ignores ON DELETE clauses unless foreign keys are switched on
+@event.listens_for(Engine, 'connect')
+def _sqlite_foreign_keys(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
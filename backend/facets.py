@@ -0,0 +1,200 @@
+# backend/facets.py
+# Facet counts for GET /tasks/browse.
+#
+# Triggers on the task table append a +1/-1 row to task_facet_delta for the
+# (category, status, assigned) cell a task enters or leaves, so every write
+# path (ORM, bulk import, sweeper, archive, cascades) is counted. Writers
+# only ever insert: no counter row is shared, so concurrent task writes in
+# the same cell never wait on each other. fold() adds the deltas into
+# task_facet_count and removes them; reads sum both, so the counts are
+# exact whether or not a fold has run. Facets are grouped from these small
+# tables instead of the tasks themselves, which keeps them flat as the task
+# table grows; `flask rebuild-facets` recomputes them from scratch.
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import DDL, event, text
+
+import background
+from extensions import db
+
+PG_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION task_facet_count_update() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO task_facet_delta (category, status, assigned, delta)
+            VALUES (coalesce(OLD.category, ''), coalesce(OLD.status, 'open'),
+                    OLD.assigned_to IS NOT NULL, -1);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO task_facet_delta (category, status, assigned, delta)
+            VALUES (coalesce(NEW.category, ''), coalesce(NEW.status, 'open'),
+                    NEW.assigned_to IS NOT NULL, 1);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "CREATE TRIGGER task_facet_count AFTER INSERT OR DELETE "
+    "OR UPDATE OF category, status, assigned_to ON task "
+    "FOR EACH ROW EXECUTE FUNCTION task_facet_count_update()",
+]
+
+_SQLITE_DECREMENT = (
+    "INSERT INTO task_facet_delta (category, status, assigned, delta) "
+    "VALUES (coalesce(old.category, ''), coalesce(old.status, 'open'), "
+    "old.assigned_to IS NOT NULL, -1);"
+)
+_SQLITE_INCREMENT = (
+    "INSERT INTO task_facet_delta (category, status, assigned, delta) "
+    "VALUES (coalesce(new.category, ''), coalesce(new.status, 'open'), "
+    "new.assigned_to IS NOT NULL, 1);"
+)
+SQLITE_DDL = [
+    f"CREATE TRIGGER task_facet_ai AFTER INSERT ON task BEGIN {_SQLITE_INCREMENT} END",
+    f"CREATE TRIGGER task_facet_ad AFTER DELETE ON task BEGIN {_SQLITE_DECREMENT} END",
+    f"CREATE TRIGGER task_facet_au AFTER UPDATE OF category, status, assigned_to ON task "
+    f"BEGIN {_SQLITE_DECREMENT} {_SQLITE_INCREMENT} END",
+]
+
+REBUILD = [
+    "DELETE FROM task_facet_delta",
+    "DELETE FROM task_facet_count",
+    "INSERT INTO task_facet_count (category, status, assigned, count) "
+    "SELECT coalesce(category, ''), coalesce(status, 'open'), assigned_to IS NOT NULL, count(*) "
+    "FROM task GROUP BY 1, 2, 3",
+]
+
+_UPSERT = ("ON CONFLICT (category, status, assigned) "
+           "DO UPDATE SET count = task_facet_count.count + excluded.count")
+# Deleting and adding in one statement: a delta committed meanwhile is
+# either moved or left for the next fold, never lost.
+PG_FOLD = [
+    "WITH moved AS (DELETE FROM task_facet_delta RETURNING category, status, assigned, delta) "
+    "INSERT INTO task_facet_count (category, status, assigned, count) "
+    f"SELECT category, status, assigned, sum(delta) FROM moved GROUP BY 1, 2, 3 {_UPSERT}",
+]
+# SQLite has one writer at a time, so nothing can slip in between
+SQLITE_FOLD = [
+    "INSERT INTO task_facet_count (category, status, assigned, count) "
+    "SELECT category, status, assigned, sum(delta) FROM task_facet_delta "
+    f"WHERE true GROUP BY 1, 2, 3 {_UPSERT}",
+    "DELETE FROM task_facet_delta",
+]
+
+# After every table exists: the triggers live on task but write to
+# task_facet_count, and create_all does not order the two.
+for statement in PG_DDL:
+    event.listen(db.metadata, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+for statement in SQLITE_DDL:
+    event.listen(db.metadata, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+FACETS = ('category', 'status', 'assigned')
+
+
+def rebuild():
+    for statement in REBUILD:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+
+def fold():
+    """Add the pending deltas into task_facet_count."""
+    dialect = db.session.get_bind().dialect.name
+    for statement in PG_FOLD if dialect == 'postgresql' else SQLITE_FOLD:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+
+_fold_lock = threading.Lock()
+_folded_at = 0.0
+
+
+def _fold_soon():
+    """Fold on the background thread at most every FACETS_FOLD_INTERVAL
+    seconds per process, so the delta table stays short."""
+    global _folded_at
+    app = current_app._get_current_object()
+    with _fold_lock:
+        if time.monotonic() - _folded_at < app.config['FACETS_FOLD_INTERVAL']:
+            return
+        _folded_at = time.monotonic()
+    background.submit(app, fold)
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def _conditions(filters):
+    """SQL condition per active filter, plus bind params."""
+    params = {name: value for name, value in filters.items() if value is not None}
+    return {name: f'{name} = :{name}' for name in params}, params
+
+
+def _others(conditions, facet):
+    # Each facet is counted with the other facets' filters only, so the
+    # counts show what picking another value would return.
+    clauses = [c for name, c in conditions.items() if name != facet]
+    return ' AND '.join(clauses) or 'TRUE'
+
+
+# Current count per cell: folded counts plus the deltas not folded yet
+CELLS = """
+    SELECT category, status, assigned, sum(count) AS count FROM (
+        SELECT category, status, assigned, count FROM task_facet_count
+        UNION ALL
+        SELECT category, status, assigned, delta FROM task_facet_delta
+    ) AS parts
+    GROUP BY category, status, assigned
+"""
+
+
+def _postgresql(conditions):
+    sums = ', '.join(
+        f"sum(count) FILTER (WHERE {_others(conditions, facet)}) AS {facet}_count"
+        for facet in FACETS)
+    return f"""
+        WITH cells AS ({CELLS})
+        SELECT category, status, assigned,
+               GROUPING(category) AS g_category, GROUPING(status) AS g_status,
+               GROUPING(assigned) AS g_assigned, {sums}
+        FROM cells
+        WHERE count > 0
+        GROUP BY GROUPING SETS ((category), (status), (assigned))
+    """
+
+
+def _sqlite(conditions):
+    # No GROUPING SETS: one small GROUP BY per facet, glued together
+    return f'WITH cells AS ({CELLS}) ' + ' UNION ALL '.join(
+        f"SELECT '{facet}' AS facet, {facet} AS value, sum(count) AS n "
+        f"FROM cells WHERE count > 0 AND {_others(conditions, facet)} "
+        f"GROUP BY {facet}"
+        for facet in FACETS)
+
+
+def facet_counts(category=None, status=None, assigned=None):
+    """{'category': {value: n}, 'status': {...}, 'assigned': {'assigned': n,
+    'unassigned': n}} for tasks matching the given filters."""
+    conditions, params = _conditions(
+        {'category': category, 'status': status, 'assigned': assigned})
+    dialect = db.session.get_bind().dialect.name
+    counts = {facet: {} for facet in FACETS}
+
+    if dialect == 'postgresql':
+        for row in db.session.execute(text(_postgresql(conditions)), params).mappings():
+            facet = next(f for f in FACETS if row[f'g_{f}'] == 0)
+            counts[facet][row[facet]] = row[f'{facet}_count'] or 0
+    else:
+        for facet, value, n in db.session.execute(text(_sqlite(conditions)), params):
+            counts[facet][bool(value) if facet == 'assigned' else value] = n or 0
+
+    _fold_soon()
+    assigned_counts = counts.pop('assigned')
+    counts['assigned'] = {'assigned': assigned_counts.get(True, 0),
+                          'unassigned': assigned_counts.get(False, 0)}
+    for facet in ('category', 'status'):
+        counts[facet] = {k: v for k, v in counts[facet].items() if v}
+    return counts
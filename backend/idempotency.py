@@ -0,0 +1,147 @@
+# backend/idempotency.py
+# Idempotency-Key support for the create endpoints.
+#
+# The first request with a key adds the key row to the view's own
+# transaction, so the key and whatever the view wrote are committed
+# together or not at all; the response is stored on the row right after.
+# A retry with the same key finds it with one primary-key read and gets the
+# stored response back without the view running again. A duplicate racing
+# the original fails on the row's primary key when it commits, which rolls
+# its writes back, and is answered from the original's row. Nothing waits:
+# a key whose response is not stored yet gets 409 with Retry-After. Keys
+# are per user and expire after IDEMPOTENCY_TTL.
+from datetime import datetime, timedelta
+from functools import wraps
+import hashlib
+
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+
+
+def _fingerprint():
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _where(user_id, key):
+    return (IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+
+
+def _clear_expired(row, now):
+    # An expired key is free again; the new claim is made as for a fresh one
+    db.session.expunge(row)
+    db.session.execute(delete(IdempotencyKey)
+                       .where(*_where(row.user_id, row.key), IdempotencyKey.expires_at <= now))
+    db.session.commit()
+
+
+def _replay(row):
+    response = current_app.response_class(row.response_body, status=row.status_code,
+                                          mimetype=row.mimetype)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _conflict(message):
+    response = jsonify({'error': message})
+    response.status_code = 409
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def _answer(row, fingerprint):
+    """The response for a request whose key is already committed."""
+    if row.fingerprint != fingerprint:
+        return jsonify({'error': f'{HEADER} was already used for a different request'}), 422
+    if row.status_code is not None:
+        return _replay(row)
+    # The key is only ever committed with the view's writes, so the original
+    # ran; its response is either about to be stored or was lost with the
+    # worker. Either way the view must not run again.
+    lock_timeout = timedelta(seconds=current_app.config['IDEMPOTENCY_LOCK_TIMEOUT'])
+    if row.locked_at > datetime.utcnow() - lock_timeout:
+        return _conflict('A request with this key is still in progress')
+    return _conflict('A request with this key was completed but its response was not saved')
+
+
+def _taken(user_id, key, fingerprint):
+    """After an IntegrityError: answer from the key row if another request
+    committed it first, else None."""
+    db.session.rollback()
+    row = db.session.get(IdempotencyKey, (user_id, key))
+    return _answer(row, fingerprint) if row is not None else None
+
+
+def idempotent(fn):
+    """Honour an Idempotency-Key header on a create view.
+
+    Use under @jwt_required(): keys are scoped to the caller. Reusing a key
+    with a different body or URL is refused with 422.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return fn(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({'error': f'{HEADER} must be at most 255 characters'}), 400
+
+        ttl = timedelta(seconds=current_app.config['IDEMPOTENCY_TTL'])
+        user_id, fingerprint = get_jwt_identity(), _fingerprint()
+        now = datetime.utcnow()
+        row = db.session.get(IdempotencyKey, (user_id, key))
+        if row is not None and row.expires_at <= now:
+            _clear_expired(row, now)
+        elif row is not None:
+            return _answer(row, fingerprint)
+        row = IdempotencyKey(user_id=user_id, key=key, fingerprint=fingerprint,
+                             locked_at=now, expires_at=now + ttl)
+        db.session.add(row)
+
+        try:
+            response = current_app.make_response(fn(*args, **kwargs))
+        except IntegrityError:
+            # Usually a duplicate that committed the key first
+            answer = _taken(user_id, key, fingerprint)
+            if answer is None:
+                raise
+            return answer
+        except Exception:
+            db.session.rollback()
+            raise
+        if response.status_code >= 500:
+            # Drops the claim unless the view committed; a retry may run it again
+            db.session.rollback()
+            return response
+
+        # Back into the session if the view rolled its transaction back
+        db.session.add(row)
+        row.status_code = response.status_code
+        row.response_body = response.get_data(as_text=True)
+        row.mimetype = response.mimetype
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # The view answered without committing and a duplicate got the key
+            answer = _taken(user_id, key, fingerprint)
+            if answer is None:
+                raise
+            return answer
+        return response
+    return wrapper
+
+
+def prune():
+    """Delete expired keys. Returns the number removed."""
+    result = db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow()))
+    db.session.commit()
+    return result.rowcount
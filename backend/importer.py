@@ -0,0 +1,343 @@
+# backend/importer.py
+# Streaming CSV/NDJSON import for users and tasks.
+#
+# The upload is parsed row by row and written in batches of
+# IMPORT_BATCH_SIZE, each in its own transaction; on PostgreSQL a batch is
+# COPY'd into a temp staging table and upserted with one INSERT .. SELECT,
+# elsewhere it is one multi-row INSERT .. ON CONFLICT. Progress is kept on
+# an ImportJob so an interrupted upload can be resent with ?job=<id> and
+# picks up after the last committed row.
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import csv
+import io
+import itertools
+import json
+import threading
+
+from flask import current_app
+from sqlalchemy import select, insert, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from changes import record
+from extensions import db
+from metrics import generate_password_hash
+from models import User, Task, SwapRequest, SwapRequestArchive
+from rollups import record_events, recategorized_events
+
+TASK_STATUSES = ('open', 'assigned', 'completed')
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+
+def _get_hash_pool(workers):
+    # hashlib releases the GIL while hashing, so threads scale across cores
+    # without forking out of a server worker.
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import-hash')
+        return _hash_pool
+
+
+def _hash_in(app):
+    # Pool threads have no app context, which the hash metrics are kept in
+    def hash_password(password):
+        with app.app_context():
+            return generate_password_hash(password)
+    return hash_password
+
+
+# -----------------------------
+# Parsing
+# -----------------------------
+def _text_stream(stream):
+    if not hasattr(stream, 'read1'):
+        stream = io.BufferedReader(stream)
+    return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+
+def parse(stream, fmt):
+    """Yield (row_number, dict or None, error) for each data row."""
+    lines = _text_stream(stream)
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            yield number, row, None
+        return
+    for number, line in enumerate((l for l in lines if l.strip()), start=1):
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, None, f'Invalid JSON: {e}'
+            continue
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, None, 'Each line must be a JSON object'
+
+
+def _str(row, key, required=False, max_length=None):
+    value = row.get(key)
+    value = value.strip() if isinstance(value, str) else value
+    if value in (None, ''):
+        if required:
+            raise ValueError(f'{key} is required')
+        return None
+    value = str(value)
+    if max_length and len(value) > max_length:
+        raise ValueError(f'{key} is longer than {max_length} characters')
+    return value
+
+
+def _int(row, key, required=False):
+    value = _str(row, key, required)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{key} must be an integer')
+
+
+def validate_user(row, now):
+    email = _str(row, 'email', required=True, max_length=120).lower()
+    if '@' not in email:
+        raise ValueError('email is invalid')
+    password = _str(row, 'password')
+    password_hash = _str(row, 'password_hash', max_length=512)
+    if not password and not password_hash:
+        raise ValueError('password or password_hash is required')
+    role = _str(row, 'role') or 'user'
+    if role not in ('user', 'admin'):
+        raise ValueError('role must be user or admin')
+    return {
+        'name': _str(row, 'name', required=True, max_length=80),
+        'email': email,
+        'password': password,
+        'password_hash': password_hash,
+        'role': role,
+        'skills': _str(row, 'skills', max_length=255),
+        'created_at': now,
+        'updated_at': now,
+    }
+
+
+def validate_task(row, now):
+    status = _str(row, 'status') or 'open'
+    if status not in TASK_STATUSES:
+        raise ValueError(f'status must be one of {", ".join(TASK_STATUSES)}')
+    return {
+        'id': _int(row, 'id'),
+        'title': _str(row, 'title', required=True, max_length=150),
+        'description': _str(row, 'description') or '',
+        'category': _str(row, 'category', max_length=100),
+        'status': status,
+        'created_by': _int(row, 'created_by', required=True),
+        'assigned_to': _int(row, 'assigned_to'),
+        'created_at': now,
+        'updated_at': now,
+    }
+
+
+# -----------------------------
+# Writing
+# -----------------------------
+def _quote(connection, name):
+    return connection.dialect.identifier_preparer.quote(name)
+
+
+def _copy_upsert(connection, table, rows, conflict, update_columns, returning):
+    """PostgreSQL: COPY ``rows`` into a temp staging table, then upsert."""
+    columns = list(rows[0])
+    target, stage = _quote(connection, table.name), f'import_stage_{table.name}'
+    column_list = ', '.join(_quote(connection, c) for c in columns)
+    connection.execute(text(
+        f'CREATE TEMP TABLE IF NOT EXISTS {stage} '
+        f'(LIKE {target} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS'))
+    connection.execute(text(f'TRUNCATE {stage}'))
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['\\N' if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {stage} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+    finally:
+        cursor.close()
+
+    updates = ', '.join(f'{_quote(connection, c)} = EXCLUDED.{_quote(connection, c)}'
+                        for c in update_columns)
+    return connection.execute(text(
+        f'INSERT INTO {target} ({column_list}) SELECT {column_list} FROM {stage} '
+        f'ON CONFLICT ({conflict}) DO UPDATE SET {updates} '
+        f'RETURNING {", ".join(returning)}')).all()
+
+
+def _values_upsert(connection, model, rows, conflict, update_columns, returning):
+    dialect_insert = postgresql.insert if connection.dialect.name == 'postgresql' else sqlite.insert
+    stmt = dialect_insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[conflict],
+        set_={c: stmt.excluded[c] for c in update_columns},
+    ).returning(*[getattr(model, c) for c in returning])
+    return connection.execute(stmt).all()
+
+
+def _upsert(model, rows, conflict, update_columns, returning):
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        return _copy_upsert(connection, model.__table__, rows, conflict, update_columns, returning)
+    return _values_upsert(connection, model, rows, conflict, update_columns, returning)
+
+
+def write_users(batch, workers, overwrite_credentials=False):
+    """Upsert users by email. ``batch`` is [(row_number, row)]; returns errors.
+
+    Existing accounts keep their password and role unless
+    ``overwrite_credentials`` is set; only their profile is updated.
+    """
+    by_email = {row['email']: row for _, row in batch}  # last one wins
+    rows = list(by_email.values())
+    plain = [row for row in rows if row['password']]
+    hash_password = _hash_in(current_app._get_current_object())
+    hashes = _get_hash_pool(workers).map(hash_password, [r['password'] for r in plain])
+    for row, hashed in zip(plain, hashes):
+        row['password_hash'] = hashed
+    for row in rows:
+        del row['password']
+
+    updatable = ['name', 'skills', 'updated_at']
+    if overwrite_credentials:
+        updatable += ['password_hash', 'role']
+    _upsert(User, rows, 'email', updatable, ['id'])
+    return []
+
+
+def _reserve_task_ids(count):
+    """PostgreSQL: take ``count`` ids from the task sequence so new rows can
+    go through the same staging COPY as updates."""
+    return db.session.scalars(text(
+        "SELECT nextval(pg_get_serial_sequence('task', 'id')) FROM generate_series(1, :n)"
+    ), {'n': count}).all()
+
+
+def write_tasks(batch):
+    """Rows with an id update that (existing) task, rows without one create a
+    task. ``batch`` is [(row_number, row)]; returns errors."""
+    user_ids = {row[key] for _, row in batch for key in ('created_by', 'assigned_to') if row[key]}
+    known_users = set(db.session.scalars(
+        select(User.id).where(User.id.in_(user_ids), User.deleted_at.is_(None))))
+    task_ids = {row['id'] for _, row in batch if row['id'] is not None}
+    current = db.session.execute(
+        select(Task.id, Task.created_by, Task.category).where(Task.id.in_(task_ids))).all()
+    owners = {r.id: r.created_by for r in current}
+    categories = {r.id: r.category for r in current}
+
+    errors, updates, creates = [], {}, []
+    for number, row in batch:
+        missing = [key for key in ('created_by', 'assigned_to')
+                   if row[key] and row[key] not in known_users]
+        if missing:
+            errors.append({'row': number, 'error': f'Unknown user in {", ".join(missing)}'})
+        elif row['id'] is None:
+            del row['id']
+            creates.append(row)
+        elif row['id'] not in owners:
+            errors.append({'row': number, 'error': f'Unknown task id {row["id"]}'})
+        else:
+            del row['created_at']
+            updates[row['id']] = row  # last one wins
+
+    connection = db.session.connection()
+    returning = ['id', 'created_by', 'assigned_to', 'created_at', 'category']
+    updatable = ['title', 'description', 'category', 'status', 'created_by',
+                 'assigned_to', 'updated_at']
+    created, updated = [], []
+    if creates and connection.dialect.name == 'postgresql':
+        for row, task_id in zip(creates, _reserve_task_ids(len(creates))):
+            row['id'] = task_id
+        created = _upsert(Task, creates, 'id', updatable, returning)
+    elif creates:
+        created = db.session.execute(
+            insert(Task).returning(*[getattr(Task, c) for c in returning]), creates).all()
+    if updates:
+        updated = _upsert(Task, list(updates.values()), 'id', updatable, returning)
+
+    # A task that changed owner takes its swaps' owner_id (the inbox key) along
+    moved = {r.id: owners[r.id] for r in updated if r.created_by != owners[r.id]}
+    swaps = []
+    if moved:
+        def new_owner(model):
+            return select(Task.created_by).where(Task.id == model.task_id).scalar_subquery()
+        connection.execute(update(SwapRequestArchive).where(SwapRequestArchive.task_id.in_(moved))
+                           .values(owner_id=new_owner(SwapRequestArchive)))
+        swaps = connection.execute(
+            update(SwapRequest).where(SwapRequest.task_id.in_(moved))
+            .values(owner_id=new_owner(SwapRequest))
+            .returning(SwapRequest.id, SwapRequest.task_id, SwapRequest.requester_id,
+                       SwapRequest.owner_id)).all()
+
+    # Keep the change feed and the activity rollups in step with the ORM path
+    record(db.session, [('task', r.id, 'insert', {r.created_by, r.assigned_to}) for r in created] +
+           [('task', r.id, 'update', {r.created_by, r.assigned_to, moved.get(r.id)})
+            for r in updated] +
+           [('swap', r.id, 'update', {r.requester_id, r.owner_id, moved[r.task_id]})
+            for r in swaps])
+    record_events(connection, [('tasks_created', r.created_at, r.category or '', 1, 0.0)
+                               for r in created])
+    record_events(connection, recategorized_events(connection, {
+        r.id: (r.created_at, categories[r.id], r.category) for r in updated
+        if (r.category or '') != (categories[r.id] or '')}))
+    return errors
+
+
+# -----------------------------
+# Driver
+# -----------------------------
+def run(job, stream, fmt, batch_size=1000, max_errors=1000, hash_workers=4,
+        overwrite_credentials=False):
+    """Import ``stream`` into ``job``'s table. Returns the reported errors."""
+    validate = validate_user if job.kind == 'users' else validate_task
+    errors, now = [], datetime.utcnow()
+
+    def report(new_errors):
+        job.rows_failed += len(new_errors)
+        room = max_errors - len(errors)
+        errors.extend(new_errors[:max(room, 0)])
+
+    rows = itertools.islice(parse(stream, fmt), job.rows_processed, None)
+    try:
+        while True:
+            chunk = list(itertools.islice(rows, batch_size))
+            if not chunk:
+                break
+            batch, bad = [], []
+            for number, row, error in chunk:
+                if error is None:
+                    try:
+                        batch.append((number, validate(row, now)))
+                        continue
+                    except ValueError as e:
+                        error = str(e)
+                bad.append({'row': number, 'error': error})
+            failed = []
+            if batch and job.kind == 'users':
+                failed = write_users(batch, hash_workers, overwrite_credentials)
+            elif batch:
+                failed = write_tasks(batch)
+            report(sorted(bad + failed, key=lambda e: e['row']))
+            job.rows_imported += len(batch) - len(failed)
+            job.rows_processed += len(chunk)
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        job.status = 'failed'
+        db.session.commit()
+        raise
+    job.status = 'done'
+    db.session.commit()
+    return errors
@@ -0,0 +1,450 @@
+# backend/metrics.py
+# Prometheus metrics served at /metrics.
+#
+# Each process keeps its counters and histograms in plain dicts (recording
+# is a lock and a couple of dict updates). Under `flask serve` every worker
+# also writes a snapshot to METRICS_DIR/worker-<pid>-<id>.json at most every
+# METRICS_FLUSH_INTERVAL seconds, and a scrape merges the snapshots with the
+# serving worker's live values, so the numbers cover all preforked workers.
+# The snapshots of workers that exited are folded into aggregate.json on
+# scrape: their counters are kept, their gauges dropped. Other processes
+# (the CLI, a single-process dev server) only report their own values.
+import atexit
+import bisect
+import fcntl
+from functools import wraps
+import json
+import os
+import threading
+import time
+import uuid
+
+import flask_jwt_extended
+from flask import current_app, has_app_context, request
+from flask_jwt_extended import default_callbacks
+from werkzeug import security
+
+PREFIX = 'taskswap_'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by route, method and status.'),
+    'http_request_duration_seconds': ('histogram', 'Request latency by route and method.'),
+    'http_requests_in_flight': ('gauge', 'Requests being handled.'),
+    'db_pool_size': ('gauge', 'Configured connection pool size.'),
+    'db_pool_checked_out': ('gauge', 'Pooled connections in use.'),
+    'db_pool_overflow': ('gauge', 'Connections open beyond the pool size.'),
+    'jwt_issued_total': ('counter', 'Tokens issued by type.'),
+    'jwt_verified_total': ('counter', 'Tokens that passed verification, by type.'),
+    'jwt_rejected_total': ('counter', 'Requests rejected by JWT checks, by reason.'),
+    'password_hash_total': ('counter', 'Password hash operations.'),
+    'password_hash_seconds_total': ('counter', 'Time spent hashing passwords.'),
+    'sweeper_expired_total': ('counter', 'Swaps and tasks expired by the sweeper, by policy.'),
+    'ratelimit_limited_total': ('counter', 'Requests refused by a rate limit.'),
+    'ratelimit_shed_total': ('counter', 'Requests shed by admission control.'),
+    'compression_responses_total': ('counter', 'Compressed responses by encoding.'),
+    'compression_bytes_in_total': ('counter', 'Bytes before compression.'),
+    'compression_bytes_out_total': ('counter', 'Bytes after compression.'),
+    'compression_cpu_seconds_total': ('counter', 'CPU time spent compressing.'),
+}
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# -----------------------------
+# Extension
+# -----------------------------
+class Metrics:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_DIR', os.path.join(app.instance_path, 'metrics'))
+        app.config.setdefault('METRICS_FLUSH_INTERVAL', 5)
+        app.config.setdefault('METRICS_BUCKETS', DEFAULT_BUCKETS)
+        app.config.setdefault('METRICS_TOKEN', None)  # require "Bearer <token>" if set
+        # Values and settings live with the app, so a second create_app()
+        # gets its own registry instead of reconfiguring this one
+        registry = app.extensions['metrics'] = Registry(app.config)
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/metrics', 'metrics', self._view, methods=['GET'])
+        jwt_manager = app.extensions.get('flask-jwt-extended')
+        if jwt_manager is not None:
+            self._instrument_jwt(jwt_manager)
+
+    @staticmethod
+    def _registry():
+        # Outside an app context there is no app to count for
+        if not has_app_context():
+            return None
+        return current_app.extensions.get('metrics')
+
+    # -- recording ---------------------------------------------------------
+    def inc(self, name, value=1, **labels):
+        registry = self._registry()
+        if registry is not None:
+            registry.inc(name, value, **labels)
+
+    def _before_request(self):
+        request.environ['metrics.started'] = time.perf_counter()
+        current_app.extensions['metrics'].enter()
+
+    def _record_request(self, status):
+        req = request._get_current_object()  # one proxy lookup instead of four
+        started = req.environ.pop('metrics.started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        rule = req.url_rule.rule if req.url_rule is not None else '<unmatched>'
+        app = current_app._get_current_object()
+        app.extensions['metrics'].record_request(app, req.method, rule, status, elapsed)
+
+    def _after_request(self, response):
+        self._record_request(response.status_code)
+        return response
+
+    def _teardown_request(self, exc=None):
+        # after_request is skipped when the view raised
+        self._record_request(500)
+
+    def _instrument_jwt(self, jwt_manager):
+        @jwt_manager.token_verification_loader
+        def _verified(jwt_header, jwt_data):
+            if request.environ.get('batch.sub_request'):
+                return True  # counted once for the /batch request
+            self.inc('jwt_verified_total', type=jwt_data.get('type', 'access'))
+            return True
+
+        # Count each rejection, then answer as flask-jwt-extended would
+        def rejected(reason, default):
+            @wraps(default)
+            def callback(*args):
+                self.inc('jwt_rejected_total', reason=reason)
+                return default(*args)
+            return callback
+
+        jwt_manager.expired_token_loader(
+            rejected('expired', default_callbacks.default_expired_token_callback))
+        jwt_manager.invalid_token_loader(
+            rejected('invalid', default_callbacks.default_invalid_token_callback))
+        jwt_manager.unauthorized_loader(
+            rejected('missing', default_callbacks.default_unauthorized_callback))
+        jwt_manager.revoked_token_loader(
+            rejected('revoked', default_callbacks.default_revoked_token_callback))
+        jwt_manager.needs_fresh_token_loader(
+            rejected('not_fresh', default_callbacks.default_needs_fresh_token_callback))
+        jwt_manager.user_lookup_error_loader(
+            rejected('deleted', default_callbacks.default_user_lookup_error_callback))
+
+    def _view(self):
+        token = current_app.config['METRICS_TOKEN']
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return current_app.response_class('Unauthorized\n', status=401, mimetype='text/plain')
+        app = current_app._get_current_object()
+        return current_app.response_class(app.extensions['metrics'].render(app),
+                                          mimetype='text/plain; version=0.0.4')
+
+
+# -----------------------------
+# Per-app registry
+# -----------------------------
+class Registry:
+    """One app's settings and this process's values, kept in
+    app.extensions['metrics']."""
+
+    def __init__(self, config):
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [count per bucket..., sum]
+        self._in_flight = 0
+        self._next_flush = 0.0
+        self.buckets = tuple(config['METRICS_BUCKETS'])
+        self.directory = config['METRICS_DIR'] if config['METRICS_ENABLED'] else None
+        self._flush_every = config['METRICS_FLUSH_INTERVAL']
+        self._worker_file = None  # set in server workers only
+
+    def start_worker(self, app):
+        """Publish this process's values for the other workers to merge.
+        Called by `flask serve` in each forked worker."""
+        if self.directory is None:
+            return
+        with self._lock:
+            # Anything recorded before the fork belongs to the master
+            self._counters, self._histograms, self._in_flight = {}, {}, 0
+        # pids get reused; the random part keeps a new worker from
+        # overwriting a dead one's file before it has been folded
+        self._worker_file = f'worker-{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+        atexit.register(self._flush, app)
+
+    # -- recording ---------------------------------------------------------
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def enter(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def record_request(self, app, method, rule, status, elapsed):
+        labels = (('method', method), ('route', rule))
+        key = ('http_requests_total', labels + (('status', str(status)),))
+        index = bisect.bisect_left(self.buckets, elapsed)
+        with self._lock:
+            self._in_flight -= 1
+            self._counters[key] = self._counters.get(key, 0) + 1
+            histogram = self._histograms.get(('http_request_duration_seconds', labels))
+            if histogram is None:
+                histogram = [0] * (len(self.buckets) + 2)
+                self._histograms[('http_request_duration_seconds', labels)] = histogram
+            histogram[index] += 1
+            histogram[-1] += elapsed
+
+        now = time.monotonic()
+        if now >= self._next_flush:
+            self._next_flush = now + self._flush_every
+            self._flush(app)
+
+    # -- snapshots ---------------------------------------------------------
+    def _gauges(self, app):
+        gauges = [('http_requests_in_flight', (), self._in_flight)]
+        if app is None:
+            return gauges
+        with app.app_context():
+            from extensions import db
+
+            for bind, engine in db.engines.items():
+                pool, labels = engine.pool, (('bind', bind or 'default'),)
+                if hasattr(pool, 'checkedout'):
+                    gauges += [('db_pool_size', labels, pool.size()),
+                               ('db_pool_checked_out', labels, pool.checkedout()),
+                               ('db_pool_overflow', labels, max(pool.overflow(), 0))]
+        return gauges
+
+    def _extension_counters(self, app):
+        # Totals the limiter and the compressor already keep per process
+        if app is None:
+            return []
+        counters = []
+        limiter = app.extensions.get('ratelimit')
+        if limiter is not None:
+            stats = limiter.stats()
+            counters += [('ratelimit_limited_total', (), stats['limited']),
+                         ('ratelimit_shed_total', (), stats['shed'])]
+        compress = app.extensions.get('compress')
+        if compress is not None:
+            for encoding, stats in compress.stats().items():
+                labels = (('encoding', encoding),)
+                counters += [('compression_responses_total', labels, stats['responses']),
+                             ('compression_bytes_in_total', labels, stats['bytes_in']),
+                             ('compression_bytes_out_total', labels, stats['bytes_out']),
+                             ('compression_cpu_seconds_total', labels, stats['cpu_seconds'])]
+        return counters
+
+    def snapshot(self, app):
+        with self._lock:
+            counters = [(name, labels, value) for (name, labels), value in self._counters.items()]
+            histograms = [(name, labels, list(values))
+                          for (name, labels), values in self._histograms.items()]
+        return {
+            'buckets': self.buckets,
+            'counters': counters + self._extension_counters(app),
+            'histograms': histograms,
+            'gauges': self._gauges(app),
+        }
+
+    def _flush(self, app):
+        if self._worker_file is None:
+            return
+        try:
+            _write_json(os.path.join(self.directory, self._worker_file), self.snapshot(app))
+        except OSError:
+            if app is not None:
+                app.logger.exception('Could not write metrics snapshot')
+
+    def reset(self):
+        """Drop every worker's snapshot; the serve command calls this at startup."""
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.directory, name))
+
+    # -- exposition --------------------------------------------------------
+    def _merge(self, snapshots):
+        """Sum (alive, snapshot) pairs into (counters, histograms, gauges)."""
+        counters, histograms, gauges = {}, {}, {}
+        for alive, snapshot in snapshots:
+            if tuple(snapshot['buckets']) != self.buckets:
+                continue
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    merged[i] += value
+            if alive:
+                for name, labels, value in snapshot['gauges']:
+                    key = (name, tuple(map(tuple, labels)))
+                    gauges[key] = gauges.get(key, 0) + value
+        return counters, histograms, gauges
+
+    def _fold_dead(self, names):
+        """Fold the snapshots of exited workers into aggregate.json so the
+        directory stays as small as the number of live workers. Returns the
+        names still to be read."""
+        dead = [name for name in names
+                if name.startswith('worker-') and not _alive(int(name.split('-')[1]))]
+        if not dead:
+            return names
+        with open(os.path.join(self.directory, 'aggregate.lock'), 'w') as lock:
+            # One folder at a time, or a file could be added twice
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            path = os.path.join(self.directory, 'aggregate.json')
+            aggregate = _read_json(path) or {'folded': []}
+            snapshots = [(False, aggregate)] if 'buckets' in aggregate else []
+            folded = []
+            for name in dead:
+                if name in aggregate['folded']:
+                    folded.append(name)  # counted before a crash, just not removed
+                    continue
+                snapshot = _read_json(os.path.join(self.directory, name))
+                if snapshot is not None:
+                    snapshots.append((False, snapshot))
+                    folded.append(name)
+            counters, histograms, _ = self._merge(snapshots)
+            # Names are kept until their files are gone, so a fold that dies
+            # before removing them cannot count them twice
+            _write_json(path, {
+                'buckets': list(self.buckets),
+                'counters': [(name, labels, value) for (name, labels), value in counters.items()],
+                'histograms': [(name, labels, values)
+                               for (name, labels), values in histograms.items()],
+                'gauges': [],
+                'folded': folded,
+            })
+            for name in folded:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+        return [name for name in names if name not in dead]
+
+    def collect(self, app):
+        """Merge all workers' snapshots: (counters, histograms, gauges)."""
+        snapshots = [(True, self.snapshot(app))]
+        if self._worker_file is not None and os.path.isdir(self.directory):
+            names = [name for name in os.listdir(self.directory)
+                     if name.startswith('worker-') and name.endswith('.json')
+                     and name != self._worker_file]
+            for name in self._fold_dead(names) + ['aggregate.json']:
+                snapshot = _read_json(os.path.join(self.directory, name))
+                if snapshot is not None and 'buckets' in snapshot:
+                    snapshots.append((name != 'aggregate.json', snapshot))
+        return self._merge(snapshots)
+
+    def render(self, app):
+        counters, histograms, gauges = self.collect(app)
+        series = {}
+        for (name, labels), value in list(counters.items()) + list(gauges.items()):
+            series.setdefault(name, []).append(f'{PREFIX}{name}{_labels(labels)} {_number(value)}')
+        for (name, labels), values in histograms.items():
+            lines, cumulative = series.setdefault(name, []), 0
+            for bound, count in zip(self.buckets + (float('inf'),), values):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{PREFIX}{name}_bucket{_labels(labels, le=le)} {cumulative}')
+            lines.append(f'{PREFIX}{name}_sum{_labels(labels)} {_number(values[-1])}')
+            lines.append(f'{PREFIX}{name}_count{_labels(labels)} {cumulative}')
+
+        out = []
+        for name in sorted(series):
+            kind, help_text = METRICS.get(name, ('untyped', ''))
+            out.append(f'# HELP {PREFIX}{name} {help_text}')
+            out.append(f'# TYPE {PREFIX}{name} {kind}')
+            out.extend(sorted(series[name]) if kind != 'histogram' else series[name])
+        return '\n'.join(out) + '\n'
+
+
+# -----------------------------
+# Instrumented helpers
+# -----------------------------
+def counted(fn, name, **labels):
+    """Wrap ``fn`` to count its calls in ``<name>_total``."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        from extensions import metrics
+
+        metrics.inc(f'{name}_total', **labels)
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def timed(fn, name, **labels):
+    """Like counted, also adding the time spent to ``<name>_seconds_total``."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        from extensions import metrics
+
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            metrics.inc(f'{name}_total', **labels)
+            metrics.inc(f'{name}_seconds_total', time.perf_counter() - started, **labels)
+    return wrapper
+
+
+# Use these instead of the werkzeug / flask-jwt-extended originals
+generate_password_hash = timed(security.generate_password_hash, 'password_hash', op='generate')
+check_password_hash = timed(security.check_password_hash, 'password_hash', op='check')
+create_access_token = counted(flask_jwt_extended.create_access_token, 'jwt_issued', type='access')
+create_refresh_token = counted(flask_jwt_extended.create_refresh_token, 'jwt_issued', type='refresh')
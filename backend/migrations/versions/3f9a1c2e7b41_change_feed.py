@@ -0,0 +1,46 @@
+"""change feed
+
+Revision ID: 3f9a1c2e7b41
+Revises: 114de4783d85
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2e7b41'
+down_revision = '114de4783d85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'change_log',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(length=10), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_change_log_created_at'), ['created_at'], unique=False)
+
+    op.create_table(
+        'change_audience',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('change_id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+        sa.ForeignKeyConstraint(['change_id'], ['change_log.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'change_id')
+    )
+
+
+def downgrade():
+    op.drop_table('change_audience')
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_change_log_created_at'))
+
+    op.drop_table('change_log')
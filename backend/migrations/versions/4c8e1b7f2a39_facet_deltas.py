@@ -0,0 +1,99 @@
+"""append-only deltas for task facet counts
+
+Revision ID: 4c8e1b7f2a39
+Revises: 9e2f6b3a8d17
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c8e1b7f2a39'
+down_revision = '9e2f6b3a8d17'
+branch_labels = None
+depends_on = None
+
+SQLITE_TRIGGERS = ('task_facet_ai', 'task_facet_ad', 'task_facet_au')
+
+# The triggers as of 7d4a9c1f3e85, which update task_facet_count in place
+OLD_PG_FUNCTION = """
+    CREATE OR REPLACE FUNCTION task_facet_count_update() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE task_facet_count SET count = count - 1
+            WHERE category = coalesce(OLD.category, '') AND status = coalesce(OLD.status, 'open')
+              AND assigned = (OLD.assigned_to IS NOT NULL);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO task_facet_count (category, status, assigned, count)
+            VALUES (coalesce(NEW.category, ''), coalesce(NEW.status, 'open'),
+                    NEW.assigned_to IS NOT NULL, 1)
+            ON CONFLICT (category, status, assigned)
+            DO UPDATE SET count = task_facet_count.count + 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+_OLD_DECREMENT = (
+    "UPDATE task_facet_count SET count = count - 1 "
+    "WHERE category = coalesce(old.category, '') AND status = coalesce(old.status, 'open') "
+    "AND assigned = (old.assigned_to IS NOT NULL);"
+)
+_OLD_INCREMENT = (
+    "INSERT INTO task_facet_count (category, status, assigned, count) "
+    "VALUES (coalesce(new.category, ''), coalesce(new.status, 'open'), "
+    "new.assigned_to IS NOT NULL, 1) "
+    "ON CONFLICT (category, status, assigned) DO UPDATE SET count = count + 1;"
+)
+OLD_SQLITE_DDL = [
+    f"CREATE TRIGGER task_facet_ai AFTER INSERT ON task BEGIN {_OLD_INCREMENT} END",
+    f"CREATE TRIGGER task_facet_ad AFTER DELETE ON task BEGIN {_OLD_DECREMENT} END",
+    f"CREATE TRIGGER task_facet_au AFTER UPDATE OF category, status, assigned_to ON task "
+    f"BEGIN {_OLD_DECREMENT} {_OLD_INCREMENT} END",
+]
+
+
+def upgrade():
+    # Same DDL facets.py attaches to create_all
+    from facets import PG_DDL, SQLITE_DDL
+
+    op.create_table(
+        'task_facet_delta',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('assigned', sa.Boolean(), nullable=False),
+        sa.Column('delta', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # The trigger itself stays; only the function it calls changes
+        op.execute(PG_DDL[0])
+    elif dialect == 'sqlite':
+        for trigger in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    from facets import PG_FOLD, SQLITE_FOLD
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(OLD_PG_FUNCTION)
+        for statement in PG_FOLD:
+            op.execute(statement)
+    elif dialect == 'sqlite':
+        for trigger in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        for statement in OLD_SQLITE_DDL:
+            op.execute(statement)
+        for statement in SQLITE_FOLD:
+            op.execute(statement)
+    op.drop_table('task_facet_delta')
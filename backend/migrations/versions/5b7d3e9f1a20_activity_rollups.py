@@ -0,0 +1,33 @@
+"""activity rollups
+
+Revision ID: 5b7d3e9f1a20
+Revises: 8c4e2d17a9f3
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7d3e9f1a20'
+down_revision = '8c4e2d17a9f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'activity_rollup',
+        sa.Column('metric', sa.String(length=40), nullable=False),
+        sa.Column('bucket', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('dimension', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('metric', 'bucket', 'bucket_start', 'dimension')
+    )
+
+
+def downgrade():
+    op.drop_table('activity_rollup')
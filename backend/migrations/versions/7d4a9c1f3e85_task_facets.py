@@ -0,0 +1,53 @@
+"""facet counts for task browse
+
+Revision ID: 7d4a9c1f3e85
+Revises: 0b5e8f2d4c61
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4a9c1f3e85'
+down_revision = '0b5e8f2d4c61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Same DDL facets.py attaches to create_all
+    from facets import PG_DDL, SQLITE_DDL, REBUILD
+
+    op.create_table(
+        'task_facet_count',
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('assigned', sa.Boolean(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('category', 'status', 'assigned')
+    )
+    op.create_index('ix_task_status_id', 'task', ['status', 'id'], unique=False)
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for statement in PG_DDL:
+            op.execute(statement)
+    elif dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+    for statement in REBUILD:
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS task_facet_count ON task")
+        op.execute("DROP FUNCTION IF EXISTS task_facet_count_update()")
+    elif dialect == 'sqlite':
+        for trigger in ('task_facet_ai', 'task_facet_ad', 'task_facet_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.drop_index('ix_task_status_id', table_name='task')
+    op.drop_table('task_facet_count')
@@ -0,0 +1,50 @@
+"""cascading deletes and user tombstones
+
+Revision ID: 8c4e2d17a9f3
+Revises: 3f9a1c2e7b41
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e2d17a9f3'
+down_revision = '3f9a1c2e7b41'
+branch_labels = None
+depends_on = None
+
+# (table, column, referenced table, ON DELETE), using PostgreSQL's default
+# constraint names from the original create_all
+FOREIGN_KEYS = [
+    ('task', 'created_by', 'user', 'CASCADE'),
+    ('task', 'assigned_to', 'user', 'SET NULL'),
+    ('swap_request', 'task_id', 'task', 'CASCADE'),
+    ('swap_request', 'requester_id', 'user', 'CASCADE'),
+    ('review', 'reviewer_id', 'user', 'CASCADE'),
+    ('review', 'reviewee_id', 'user', 'CASCADE'),
+    ('review', 'task_id', 'task', 'CASCADE'),
+]
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_user_deleted_at'), ['deleted_at'], unique=False)
+
+    for table, column, referent, ondelete in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referent, [column], ['id'], ondelete=ondelete)
+
+
+def downgrade():
+    for table, column, referent, _ in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referent, [column], ['id'])
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_deleted_at'))
+        batch_op.drop_column('deleted_at')
@@ -0,0 +1,33 @@
+"""indexes for incremental snapshots
+
+Revision ID: 9e2f6b3a8d17
+Revises: 7d4a9c1f3e85
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e2f6b3a8d17'
+down_revision = '7d4a9c1f3e85'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_user_updated_at_id', 'user', ['updated_at', 'id']),
+    ('ix_task_updated_at_id', 'task', ['updated_at', 'id']),
+    ('ix_swap_request_created_at_id', 'swap_request', ['created_at', 'id']),
+    ('ix_review_created_at_id', 'review', ['created_at', 'id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,55 @@
+"""swap request owner and inbox indexes
+
+Revision ID: a1e6f04c8d52
+Revises: 5b7d3e9f1a20
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1e6f04c8d52'
+down_revision = '5b7d3e9f1a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('swap_request', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('owner_id', sa.Integer(), nullable=True))
+
+    op.execute(
+        "UPDATE swap_request SET owner_id = "
+        "(SELECT created_by FROM task WHERE task.id = swap_request.task_id)"
+    )
+    # Keep the oldest pending request per (task, requester); the rest would
+    # violate the new unique index.
+    op.execute(
+        "UPDATE swap_request SET status = 'rejected' "
+        "WHERE status = 'pending' AND id NOT IN ("
+        "SELECT MIN(id) FROM swap_request WHERE status = 'pending' "
+        "GROUP BY task_id, requester_id)"
+    )
+
+    with op.batch_alter_table('swap_request', schema=None) as batch_op:
+        batch_op.alter_column('owner_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('swap_request_owner_id_fkey', 'user', ['owner_id'], ['id'],
+                                    ondelete='CASCADE')
+        batch_op.create_index('ix_swap_request_task_status', ['task_id', 'status'], unique=False)
+        batch_op.create_index('ix_swap_request_owner_status', ['owner_id', 'status', 'id'], unique=False)
+        batch_op.create_index('ix_swap_request_requester', ['requester_id', 'id'], unique=False)
+        batch_op.create_index('uq_swap_request_pending', ['task_id', 'requester_id'], unique=True,
+                              postgresql_where=sa.text("status = 'pending'"),
+                              sqlite_where=sa.text("status = 'pending'"))
+
+
+def downgrade():
+    with op.batch_alter_table('swap_request', schema=None) as batch_op:
+        batch_op.drop_index('uq_swap_request_pending')
+        batch_op.drop_index('ix_swap_request_requester')
+        batch_op.drop_index('ix_swap_request_owner_status')
+        batch_op.drop_index('ix_swap_request_task_status')
+        batch_op.drop_constraint('swap_request_owner_id_fkey', type_='foreignkey')
+        batch_op.drop_column('owner_id')
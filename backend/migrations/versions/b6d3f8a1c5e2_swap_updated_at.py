@@ -0,0 +1,34 @@
+"""updated_at on swap requests
+
+Revision ID: b6d3f8a1c5e2
+Revises: 4c8e1b7f2a39
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d3f8a1c5e2'
+down_revision = '4c8e1b7f2a39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('swap_request', 'swap_request_archive'):
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = created_at")
+    op.drop_index('ix_swap_request_created_at_id', table_name='swap_request')
+    op.create_index('ix_swap_request_updated_at_id', 'swap_request', ['updated_at', 'id'],
+                    unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_swap_request_updated_at_id', table_name='swap_request')
+    op.create_index('ix_swap_request_created_at_id', 'swap_request', ['created_at', 'id'],
+                    unique=False)
+    for table in ('swap_request_archive', 'swap_request'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,78 @@
+"""archive tables for completed tasks and settled swaps
+
+Revision ID: d2b8c6a4e013
+Revises: a1e6f04c8d52
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2b8c6a4e013'
+down_revision = 'a1e6f04c8d52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'task_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('title', sa.String(length=150), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=False),
+        sa.Column('assigned_to', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['created_by'], ['user.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['assigned_to'], ['user.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_task_archive_created_by', 'task_archive', ['created_by'], unique=False)
+    op.create_index('ix_task_archive_assigned_to', 'task_archive', ['assigned_to'], unique=False)
+
+    op.create_table(
+        'swap_request_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('requester_id', sa.Integer(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['requester_id'], ['user.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_swap_request_archive_task_id', 'swap_request_archive', ['task_id'], unique=False)
+    op.create_index('ix_swap_request_archive_owner', 'swap_request_archive', ['owner_id', 'id'], unique=False)
+    op.create_index('ix_swap_request_archive_requester', 'swap_request_archive', ['requester_id', 'id'], unique=False)
+
+    op.create_table(
+        'review_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('reviewer_id', sa.Integer(), nullable=False),
+        sa.Column('reviewee_id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Float(), nullable=False),
+        sa.Column('comment', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['reviewer_id'], ['user.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['reviewee_id'], ['user.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['task_id'], ['task_archive.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_review_archive_reviewee_id', 'review_archive', ['reviewee_id'], unique=False)
+    op.create_index('ix_review_archive_task_id', 'review_archive', ['task_id'], unique=False)
+
+
+def downgrade():
+    op.drop_table('review_archive')
+    op.drop_table('swap_request_archive')
+    op.drop_table('task_archive')
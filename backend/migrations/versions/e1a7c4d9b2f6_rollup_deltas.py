@@ -0,0 +1,40 @@
+"""append-only deltas for activity rollups
+
+Revision ID: e1a7c4d9b2f6
+Revises: b6d3f8a1c5e2
+Create Date: 2026-10-21 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1a7c4d9b2f6'
+down_revision = 'b6d3f8a1c5e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'activity_rollup_delta',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+        sa.Column('metric', sa.String(length=40), nullable=False),
+        sa.Column('bucket', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('dimension', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    # Keep what has not been folded yet
+    from rollups import PG_FOLD, SQLITE_FOLD
+
+    dialect = op.get_bind().dialect.name
+    for statement in PG_FOLD if dialect == 'postgresql' else SQLITE_FOLD:
+        op.execute(statement)
+    op.drop_table('activity_rollup_delta')
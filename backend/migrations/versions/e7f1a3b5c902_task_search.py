@@ -0,0 +1,40 @@
+"""full-text search index on tasks
+
+Revision ID: e7f1a3b5c902
+Revises: d2b8c6a4e013
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7f1a3b5c902'
+down_revision = 'd2b8c6a4e013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Same DDL search.py attaches to create_all
+    from search import PG_DDL, SQLITE_DDL
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for statement in PG_DDL:
+            op.execute(statement)
+    elif dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO task_fts(task_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_task_search_vector")
+        op.execute("ALTER TABLE task DROP COLUMN IF EXISTS search_vector")
+    elif dialect == 'sqlite':
+        for trigger in ('task_fts_ai', 'task_fts_ad', 'task_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS task_fts")
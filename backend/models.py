@@ -12,40 +12,57 @@ class User(db.Model):
     avatar_url = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=db.func.now())
     updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+    # Tombstone: set when deletion is requested, row purged in the background
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    # Incremental snapshots (snapshot.py) range-scan on (updated_at, id)
+    __table_args__ = (db.Index('ix_user_updated_at_id', 'updated_at', 'id'),)
+
+    # Dependent rows are removed by the database (ON DELETE CASCADE / SET
+    # NULL); passive_deletes keeps the ORM from loading them first.
 
     # Tasks created by user
     tasks_created = db.relationship(
         "Task",
         foreign_keys="Task.created_by",
-        back_populates="creator"
+        back_populates="creator",
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
 
     # Tasks assigned to user
     tasks_assigned = db.relationship(
         "Task",
         foreign_keys="Task.assigned_to",
-        back_populates="assignee"
+        back_populates="assignee",
+        passive_deletes=True
     )
 
     # Swap requests made by user
     swap_requests = db.relationship(
         "SwapRequest",
         foreign_keys="SwapRequest.requester_id",
-        back_populates="requester"
+        back_populates="requester",
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
 
     # Reviews written by user
     reviews_written = db.relationship(
         "Review",
         foreign_keys="Review.reviewer_id",
-        back_populates="reviewer"
+        back_populates="reviewer",
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
 
     # Reviews received by user
     reviews_received = db.relationship(
         "Review",
         foreign_keys="Review.reviewee_id",
-        back_populates="reviewee"
+        back_populates="reviewee",
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
 
     # -----------------------------
@@ -54,6 +71,9 @@ class User(db.Model):
     def is_admin(self):
         return self.role.lower() == 'admin'
 
+    def is_deleted(self):
+        return self.deleted_at is not None
+
     def serialize(self):
             return {
                 "id": self.id,
@@ -73,12 +93,21 @@ class Task(db.Model):
     title = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(100))
-    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    assigned_to = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
-    status = db.Column(db.String(50), default='open')  # open, assigned, completed
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    assigned_to = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    status = db.Column(db.String(50), default='open')  # open, assigned, completed, expired
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # GET /tasks/browse: newest first within a status
+        db.Index('ix_task_status_id', 'status', 'id'),
+        # Incremental snapshots (snapshot.py)
+        db.Index('ix_task_updated_at_id', 'updated_at', 'id'),
+        # Archived rows keep their id, so SQLite must never hand it out again
+        {'sqlite_autoincrement': True},
+    )
+
     # Relationships
     creator = db.relationship(
         "User",
@@ -95,13 +124,15 @@ class Task(db.Model):
     swap_requests = db.relationship(
         "SwapRequest",
         back_populates="task",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
 
     reviews = db.relationship(
         "Review",
         back_populates="task",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
 
     def serialize(self):
@@ -127,14 +158,29 @@ class Task(db.Model):
 
 class SwapRequest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
-    requester_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    status = db.Column(db.String(50), default='pending')  # pending, accepted, rejected
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id', ondelete='CASCADE'), nullable=False)
+    requester_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    # Copy of task.created_by so the owner's inbox needs no join
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    status = db.Column(db.String(50), default='pending')  # pending, accepted, rejected, expired
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_swap_request_task_status', 'task_id', 'status'),
+        db.Index('ix_swap_request_owner_status', 'owner_id', 'status', 'id'),
+        db.Index('ix_swap_request_requester', 'requester_id', 'id'),
+        db.Index('ix_swap_request_updated_at_id', 'updated_at', 'id'),
+        # One pending request per task and requester
+        db.Index('uq_swap_request_pending', 'task_id', 'requester_id', unique=True,
+                 postgresql_where=db.text("status = 'pending'"),
+                 sqlite_where=db.text("status = 'pending'")),
+        {'sqlite_autoincrement': True},
+    )
 
     # Relationships
     task = db.relationship("Task", back_populates="swap_requests")
-    requester = db.relationship("User", back_populates="swap_requests")
+    requester = db.relationship("User", foreign_keys=[requester_id], back_populates="swap_requests")
 
     def serialize(self):
         return {
@@ -145,16 +191,39 @@ class SwapRequest(db.Model):
             "created_at": self.created_at.isoformat(),
         }
 
+    def serialize_compact(self):
+        return {
+            "id": self.id,
+            "task_id": self.task_id,
+            "requester_id": self.requester_id,
+            "owner_id": self.owner_id,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+@db.event.listens_for(SwapRequest, 'before_insert')
+def _set_swap_owner(mapper, connection, target):
+    if target.owner_id is None:
+        task = target.__dict__.get('task')
+        target.owner_id = task.created_by if task is not None else connection.scalar(
+            db.select(Task.created_by).where(Task.id == target.task_id))
+
 
 class Review(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    reviewer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    reviewee_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
+    reviewer_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    reviewee_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id', ondelete='CASCADE'), nullable=False)
     rating = db.Column(db.Float, nullable=False)
     comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_review_created_at_id', 'created_at', 'id'),
+        {'sqlite_autoincrement': True},
+    )
+
     # Relationships
     reviewer = db.relationship("User", foreign_keys=[reviewer_id], back_populates="reviews_written")
     reviewee = db.relationship("User", foreign_keys=[reviewee_id], back_populates="reviews_received")
@@ -170,3 +239,201 @@ class Review(db.Model):
             "comment": self.comment,
             "created_at": self.created_at.isoformat(),
         }
+
+
+# -----------------------------
+# Change feed (see changes.py)
+# -----------------------------
+class ChangeLog(db.Model):
+    __tablename__ = 'change_log'
+
+    # Doubles as the sync cursor handed to clients
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # task, swap, review
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # insert, update, delete
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def serialize(self):
+        return {
+            "cursor": self.id,
+            "entity": self.entity,
+            "id": self.entity_id,
+            "op": self.op,
+            "at": self.created_at.isoformat(),
+        }
+
+
+class ChangeAudience(db.Model):
+    """Users allowed to see a change. Admins read change_log directly."""
+    __tablename__ = 'change_audience'
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    change_id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'),
+                          db.ForeignKey('change_log.id', ondelete='CASCADE'),
+                          primary_key=True)
+
+
+# -----------------------------
+# Analytics rollups (see rollups.py)
+# -----------------------------
+class ActivityRollup(db.Model):
+    __tablename__ = 'activity_rollup'
+
+    metric = db.Column(db.String(40), primary_key=True)  # tasks_created, swaps_created, ...
+    bucket = db.Column(db.String(10), primary_key=True)  # hour, day
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    dimension = db.Column(db.String(100), primary_key=True, default='')  # task category
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0.0)
+
+
+# What each flush adds to a rollup row, until rollups.fold() adds them up
+class ActivityRollupDelta(db.Model):
+    __tablename__ = 'activity_rollup_delta'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    metric = db.Column(db.String(40), nullable=False)
+    bucket = db.Column(db.String(10), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    dimension = db.Column(db.String(100), nullable=False, default='')
+    count = db.Column(db.Integer, nullable=False)
+    total = db.Column(db.Float, nullable=False)
+
+
+# -----------------------------
+# Cold storage (see archive.py)
+# -----------------------------
+# Same columns as the hot tables plus archived_at. Rows keep their ids, and
+# are read-only: they only come back through by-id fallbacks and
+# ?include_archived= listings.
+class TaskArchive(db.Model):
+    __tablename__ = 'task_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(150), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    category = db.Column(db.String(100))
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    assigned_to = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True, index=True)
+    status = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    creator = db.relationship("User", foreign_keys=[created_by])
+    assignee = db.relationship("User", foreign_keys=[assigned_to])
+
+    def serialize(self):
+        return dict(Task.serialize(self), archived=True)
+
+
+class SwapRequestArchive(db.Model):
+    __tablename__ = 'swap_request_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    task_id = db.Column(db.Integer, nullable=False, index=True)
+    requester_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    status = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_swap_request_archive_owner', 'owner_id', 'id'),
+        db.Index('ix_swap_request_archive_requester', 'requester_id', 'id'),
+    )
+
+    def serialize_compact(self):
+        return dict(SwapRequest.serialize_compact(self), archived=True)
+
+
+class ReviewArchive(db.Model):
+    __tablename__ = 'review_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    reviewer_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    reviewee_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('task_archive.id', ondelete='CASCADE'), nullable=False, index=True)
+    rating = db.Column(db.Float, nullable=False)
+    comment = db.Column(db.Text)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    reviewer = db.relationship("User", foreign_keys=[reviewer_id])
+    reviewee = db.relationship("User", foreign_keys=[reviewee_id])
+    task = db.relationship("TaskArchive")
+
+    def serialize(self):
+        return dict(Review.serialize(self), archived=True)
+
+
+# -----------------------------
+# Bulk import progress (see importer.py)
+# -----------------------------
+class ImportJob(db.Model):
+    __tablename__ = 'import_job'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # users, tasks
+    status = db.Column(db.String(20), nullable=False, default='running')  # running, done, failed
+    # Data rows consumed and committed so far; a resumed upload skips these
+    rows_processed = db.Column(db.Integer, nullable=False, default=0)
+    rows_imported = db.Column(db.Integer, nullable=False, default=0)
+    rows_failed = db.Column(db.Integer, nullable=False, default=0)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "rows_processed": self.rows_processed,
+            "rows_imported": self.rows_imported,
+            "rows_failed": self.rows_failed,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+# -----------------------------
+# Idempotency keys (see idempotency.py)
+# -----------------------------
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_key'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of method, path and body
+    # NULL until the original's response is stored
+    status_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    mimetype = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+# -----------------------------
+# Browse facets (see facets.py); fed by triggers on task
+# -----------------------------
+class TaskFacetCount(db.Model):
+    __tablename__ = 'task_facet_count'
+
+    category = db.Column(db.String(100), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    assigned = db.Column(db.Boolean, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+# +1/-1 per task entering/leaving a cell, until facets.fold() adds them up
+class TaskFacetDelta(db.Model):
+    __tablename__ = 'task_facet_delta'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    category = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    assigned = db.Column(db.Boolean, nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
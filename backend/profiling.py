@@ -0,0 +1,380 @@
+# backend/profiling.py
+# On-demand request profiling for admins.
+#
+# A route can be armed for a while from POST /admin/profiles (a share of its
+# requests gets profiled), and an admin can profile one request by sending
+# "X-Profile: 1" (or "X-Profile: cprofile"). Sample mode polls the request
+# thread's stack from a helper thread and counts collapsed stacks; cprofile
+# mode runs cProfile around the request. Results are written under
+# PROFILING_DIR, one file per endpoint and worker process, so the download
+# views see what every worker on this host collected.
+#
+# With nothing armed the hooks cost a clock read and a dict lookup per
+# request; PROFILING_ENABLED = False does not register them at all.
+from collections import Counter
+import cProfile
+import json
+import os
+import pstats
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from flask import current_app, request
+
+MODES = ('sample', 'cprofile')
+TARGETS_FILE = 'targets.json'
+
+
+def _frame_label(code):
+    path = '/'.join(code.co_filename.split(os.sep)[-2:])
+    return f'{code.co_name} ({path}:{code.co_firstlineno})'
+
+
+def collapse(frame):
+    """Root-first ``a;b;c`` stack of ``frame``."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def _listdir(directory):
+    try:
+        return os.listdir(directory)
+    except FileNotFoundError:
+        return []
+
+
+def _read_targets(directory):
+    try:
+        with open(os.path.join(directory, TARGETS_FILE)) as f:
+            targets = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    now = time.time()
+    return {k: v for k, v in targets.items() if v['until'] > now}
+
+
+def _write_atomic(path, data):
+    # Private to the server's user: targets.json arms profiling, and the
+    # collected stacks show what requests were doing
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# Collectors
+# -----------------------------
+class _Sampler:
+    """One helper thread per app sampling the request threads that are
+    currently being profiled. It sleeps while there are none."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._stacks = {}  # thread ident -> Counter
+        self._thread = None
+        self.interval = 0.005
+
+    def add(self, ident):
+        stacks = Counter()
+        with self._cond:
+            self._stacks[ident] = stacks
+            # Not alive after a fork: every worker starts its own
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='profile-sampler',
+                                                daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return stacks
+
+    def remove(self, ident):
+        with self._cond:
+            self._stacks.pop(ident, None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stacks:
+                    self._cond.wait()
+                frames = sys._current_frames()
+                for ident, stacks in self._stacks.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[collapse(frame)] += 1
+            time.sleep(self.interval)
+
+
+class _SampleSession:
+    mode = 'sample'
+
+    def __init__(self, sampler):
+        self._sampler = sampler
+        self._ident = threading.get_ident()
+        self.stacks = sampler.add(self._ident)
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self._sampler.remove(self._ident)
+        return time.perf_counter() - self.started
+
+
+class _CProfileSession:
+    mode = 'cprofile'
+
+    def __init__(self, lock):
+        self._lock = lock
+        self.profile = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self._lock.release()
+        return time.perf_counter() - self.started
+
+
+# -----------------------------
+# Extension
+# -----------------------------
+class _State:
+    """One app's settings, sampler and results, kept in
+    app.extensions['profiler']."""
+
+    def __init__(self, config):
+        self.lock = threading.Lock()
+        self.sampler = _Sampler()
+        self.sampler.interval = config['PROFILING_INTERVAL']
+        self.directory = config['PROFILING_DIR'] if config['PROFILING_ENABLED'] else None
+        self.refresh_every = config['PROFILING_REFRESH']
+        self.collected = {}  # endpoint -> this process's aggregate
+        self.targets = {}
+        self.targets_mtime = None
+        self.next_refresh = 0.0
+
+
+class Profiler:
+    def __init__(self, app=None):
+        # cProfile can't run for two requests at once in one process (3.12+
+        # hooks are interpreter-wide); overlapping requests fall back to sampling.
+        self._cprofile_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILING_ENABLED', True)
+        app.config.setdefault('PROFILING_DIR', os.path.join(app.instance_path, 'profiles'))
+        app.config.setdefault('PROFILING_INTERVAL', 0.005)  # seconds between samples
+        app.config.setdefault('PROFILING_REFRESH', 1)  # seconds between target reloads
+        app.extensions['profiler'] = _State(app.config)
+        if not app.config['PROFILING_ENABLED']:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    @staticmethod
+    def _state():
+        return current_app.extensions['profiler']
+
+    # -- arming ------------------------------------------------------------
+    def targets(self):
+        """Armed endpoints shared by every worker: {endpoint: {mode, rate, until}}."""
+        return _read_targets(self._state().directory)
+
+    def arm(self, endpoint, mode='sample', rate=1.0, seconds=300):
+        state = self._state()
+        with state.lock:
+            targets = _read_targets(state.directory)
+            targets[endpoint] = {'mode': mode, 'rate': rate, 'until': time.time() + seconds}
+            _write_atomic(os.path.join(state.directory, TARGETS_FILE), json.dumps(targets))
+        state.next_refresh = 0.0
+        return targets[endpoint]
+
+    def disarm(self, endpoint):
+        state = self._state()
+        with state.lock:
+            targets = _read_targets(state.directory)
+            targets.pop(endpoint, None)
+            _write_atomic(os.path.join(state.directory, TARGETS_FILE), json.dumps(targets))
+            state.collected.pop(endpoint, None)
+            for name in _listdir(state.directory):
+                if name.rsplit('.', 2)[0] == endpoint:
+                    os.remove(os.path.join(state.directory, name))
+        state.next_refresh = 0.0
+
+    @staticmethod
+    def _refresh_targets(state, now):
+        state.next_refresh = now + state.refresh_every
+        try:
+            mtime = os.stat(os.path.join(state.directory, TARGETS_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != state.targets_mtime:
+            state.targets_mtime = mtime
+            state.targets = _read_targets(state.directory)
+
+    # -- request hooks -----------------------------------------------------
+    def _before_request(self):
+        state = self._state()
+        now = time.monotonic()
+        if now >= state.next_refresh:
+            self._refresh_targets(state, now)
+        header = request.headers.get('X-Profile')
+        target = state.targets.get(request.endpoint) if state.targets else None
+        if header:
+            if not _is_admin():
+                return
+            mode = 'cprofile' if header.strip().lower() == 'cprofile' else 'sample'
+        elif target and target['until'] > time.time() and random.random() < target['rate']:
+            mode = target['mode']
+        else:
+            return
+        request.environ['profiling.session'] = self._start(state, mode)
+
+    def _start(self, state, mode):
+        if mode == 'cprofile' and self._cprofile_lock.acquire(blocking=False):
+            try:
+                return _CProfileSession(self._cprofile_lock)
+            except ValueError:  # another profiler is active
+                self._cprofile_lock.release()
+        return _SampleSession(state.sampler)
+
+    def _after_request(self, response):
+        if self._finish():
+            response.headers['X-Profile'] = request.endpoint or 'unknown'
+        return response
+
+    def _teardown_request(self, exc=None):
+        # after_request is skipped when the view raised
+        self._finish()
+
+    def _finish(self):
+        session = request.environ.pop('profiling.session', None)
+        if session is None:
+            return False
+        seconds = session.stop()
+        try:
+            self._save(request.endpoint or 'unknown', session, seconds)
+        except OSError:
+            current_app.logger.exception('Could not save profile')
+            return False
+        return True
+
+    # -- storage -----------------------------------------------------------
+    def _save(self, endpoint, session, seconds):
+        state = self._state()
+        base = os.path.join(state.directory, f'{endpoint}.{os.getpid()}')
+        with state.lock:
+            collected = state.collected.setdefault(endpoint, {
+                'requests': 0, 'seconds': 0.0, 'interval': state.sampler.interval,
+                'stacks': Counter(), 'stats': None,
+            })
+            collected['requests'] += 1
+            collected['seconds'] += seconds
+            if session.mode == 'sample':
+                collected['stacks'].update(session.stacks)
+            elif collected['stats'] is None:
+                collected['stats'] = pstats.Stats(session.profile)
+            else:
+                collected['stats'].add(session.profile)
+            _write_atomic(f'{base}.json', json.dumps({
+                'requests': collected['requests'],
+                'seconds': collected['seconds'],
+                'interval': collected['interval'],
+                'stacks': collected['stacks'],
+            }))
+            if session.mode == 'cprofile':
+                collected['stats'].dump_stats(f'{base}.prof')
+
+    def profiles(self):
+        """Every worker's results merged: {endpoint: {requests, seconds,
+        interval, stacks, pstats_files}}."""
+        state = self._state()
+        merged = {}
+        for name in sorted(_listdir(state.directory)):
+            parts = name.rsplit('.', 2)
+            if len(parts) != 3 or parts[2] not in ('json', 'prof'):
+                continue
+            endpoint, _, ext = parts
+            path = os.path.join(state.directory, name)
+            profile = merged.setdefault(endpoint, {
+                'requests': 0, 'seconds': 0.0, 'interval': state.sampler.interval,
+                'stacks': Counter(), 'pstats_files': [],
+            })
+            if ext == 'prof':
+                profile['pstats_files'].append(path)
+                continue
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+            profile['requests'] += data['requests']
+            profile['seconds'] += data['seconds']
+            profile['interval'] = data['interval']
+            profile['stacks'].update(data['stacks'])
+        return merged
+
+
+def _is_admin():
+    # Imported here: models imports extensions, which imports this module
+    from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+    from flask_jwt_extended.exceptions import JWTExtendedException
+    from jwt.exceptions import PyJWTError
+    from models import User
+
+    try:
+        verify_jwt_in_request(optional=True)
+    except (JWTExtendedException, PyJWTError):
+        return False
+    identity = get_jwt_identity()
+    user = User.query.get(identity) if identity is not None else None
+    return bool(user and user.is_admin())
+
+
+# -----------------------------
+# Output formats
+# -----------------------------
+def to_collapsed(stacks):
+    """Brendan Gregg's folded format, for flamegraph.pl / speedscope / inferno."""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+def to_speedscope(name, stacks, interval):
+    frames, index, samples, weights = [], {}, [], []
+    for stack, count in stacks.most_common():
+        sample = []
+        for label in stack.split(';'):
+            if label not in index:
+                index[label] = len(frames)
+                frames.append({'name': label})
+            sample.append(index[label])
+        samples.append(sample)
+        weights.append(count * interval)
+    total = sum(weights)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'taskswap',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled', 'name': name, 'unit': 'seconds',
+            'startValue': 0, 'endValue': total,
+            'samples': samples, 'weights': weights,
+        }],
+    }
+
+
+def merge_pstats(paths):
+    """Merged cProfile stats from several workers, as a .prof file's bytes."""
+    stats = pstats.Stats(*paths)
+    with tempfile.NamedTemporaryFile(suffix='.prof') as f:
+        stats.dump_stats(f.name)
+        return f.read()
@@ -0,0 +1,272 @@
+# backend/ratelimit.py
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+try:
+    import redis
+except ImportError:  # optional
+    redis = None
+
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'10/minute' -> (10, 60). Burst capacity equals the count."""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period.strip().rstrip('s')]
+
+
+# -----------------------------
+# Keys
+# -----------------------------
+def by_ip():
+    return request.remote_addr or 'unknown'
+
+
+def by_identity():
+    """JWT identity of the caller; use under @jwt_required()."""
+    from flask_jwt_extended import get_jwt_identity
+    try:
+        identity = get_jwt_identity()
+    except RuntimeError:
+        identity = None
+    return str(identity) if identity is not None else by_ip()
+
+
+def by_email():
+    """Account being logged into / registered, for unauthenticated routes."""
+    data = request.get_json(silent=True) or {}
+    email = data.get('email')
+    return email.strip().lower() if isinstance(email, str) else by_ip()
+
+
+# -----------------------------
+# Bucket stores
+# -----------------------------
+class MemoryStore:
+    """Token buckets and the in-flight count of this process, guarded by
+    one lock."""
+
+    shared = False
+
+    def __init__(self, max_keys=100000):
+        self._lock = threading.Lock()
+        # Least recently used first, so eviction is O(1)
+        self._buckets = OrderedDict()
+        self._in_flight = 0
+        self.max_keys = max_keys
+
+    def take(self, key, capacity, period):
+        """Take one token. Returns 0 on success or seconds until one is free."""
+        refill = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - stamp) * refill)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / refill
+            self._buckets.move_to_end(key)
+            # Forgetting the least recently seen key only refills its bucket
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def enter(self, token, ttl):
+        """Count a request in. Returns the number now in flight."""
+        with self._lock:
+            self._in_flight += 1
+            return self._in_flight
+
+    def leave(self, token):
+        with self._lock:
+            self._in_flight -= 1
+
+
+class RedisStore:
+    """Token buckets and the in-flight count shared by every worker through
+    Redis."""
+
+    shared = True
+    IN_FLIGHT_KEY = 'ratelimit:in_flight'
+
+    # In-flight requests are members of a sorted set scored by when they
+    # stop counting, so the entries of a worker that died mid-request
+    # drop out on their own instead of inflating the count forever.
+    ENTER = """
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[3])
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+    return redis.call('ZCARD', KEYS[1])
+    """
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local period = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local refill = capacity / period
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+    local tokens = tonumber(state[1]) or capacity
+    local stamp = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - stamp) * refill)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / refill
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'stamp', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(period) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError('RATELIMIT_STORAGE_URL requires the redis package')
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(self.SCRIPT)
+        self._enter = self._client.register_script(self.ENTER)
+
+    def take(self, key, capacity, period):
+        return float(self._take(keys=[f'ratelimit:{key}'],
+                                args=[capacity, period, time.time()]))
+
+    def enter(self, token, ttl):
+        now = time.time()
+        return int(self._enter(keys=[self.IN_FLIGHT_KEY],
+                               args=[now, now + ttl, token, math.ceil(ttl)]))
+
+    def leave(self, token):
+        self._client.zrem(self.IN_FLIGHT_KEY, token)
+
+
+def _too_many(message, status, retry_after):
+    response = jsonify({'error': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+# -----------------------------
+# Extension
+# -----------------------------
+class _State:
+    """One app's store and counts, kept in app.extensions['ratelimit']."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._stats = {'limited': 0, 'shed': 0}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+class RateLimiter:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_STORAGE_URL', None)
+        # Admission control. The count is global when the store is shared
+        # (Redis), per worker otherwise; the thresholds default to half and
+        # all but one of the request threads it covers (SERVE_WORKERS x
+        # SERVE_THREADS, set by `flask serve`, or SERVE_THREADS alone).
+        app.config.setdefault('SERVE_WORKERS', 1)
+        app.config.setdefault('SERVE_THREADS', 4)
+        app.config.setdefault('ADMISSION_SHED_LOW_AT', None)
+        app.config.setdefault('ADMISSION_SHED_ALL_AT', None)
+        app.config.setdefault('ADMISSION_RETRY_AFTER', 1)
+        # How long a request counts as in flight at most (shared store)
+        app.config.setdefault('ADMISSION_ENTRY_TTL', 60)
+
+        url = app.config['RATELIMIT_STORAGE_URL']
+        app.extensions['ratelimit'] = _State(RedisStore(url) if url else MemoryStore())
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+
+    # -- per-route limits --------------------------------------------------
+    def limit(self, rate, key=by_ip, scope=None):
+        """Limit a view to ``rate`` (e.g. '5/minute') per ``key()``.
+
+        Stack several to combine per-IP and per-identity buckets. Put it
+        under @jwt_required() when keying on the JWT identity.
+        """
+        capacity, period = parse_rate(rate)
+
+        def decorator(fn):
+            bucket = scope or f'{fn.__module__}.{fn.__name__}'
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if current_app.config['RATELIMIT_ENABLED']:
+                    state = current_app.extensions['ratelimit']
+                    wait = state.store.take(f'{bucket}:{key.__name__}:{key()}',
+                                            capacity, period)
+                    if wait:
+                        state.count('limited')
+                        return _too_many('Too many requests', 429, wait)
+                return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # -- admission control -------------------------------------------------
+    @staticmethod
+    def low_priority(fn):
+        """Mark a view as first to be shed when the worker is saturated."""
+        fn._priority = 'low'
+        return fn
+
+    @staticmethod
+    def thresholds(app):
+        """(shed low priority above, shed everything above) in-flight requests."""
+        config = app.config
+        threads = config['SERVE_THREADS']
+        if app.extensions['ratelimit'].store.shared:
+            threads *= config['SERVE_WORKERS']
+        low, all_ = config['ADMISSION_SHED_LOW_AT'], config['ADMISSION_SHED_ALL_AT']
+        # A worker never has more requests in flight than threads; the last
+        # free thread turns requests away quickly instead of queueing them.
+        return (low if low is not None else max(1, threads // 2),
+                all_ if all_ is not None else max(1, threads - 1))
+
+    def _admit(self):
+        if request.environ.get('batch.sub_request'):
+            return  # the /batch request around it holds the slot
+        app = current_app._get_current_object()
+        store, config = app.extensions['ratelimit'].store, app.config
+        # The shared store needs an id to take this request out again
+        token = uuid.uuid4().hex if store.shared else True
+        in_flight = store.enter(token, config['ADMISSION_ENTRY_TTL'])
+        request.environ['ratelimit.admitted'] = token
+
+        low, all_ = self.thresholds(app)
+        shed = in_flight > all_
+        if not shed and in_flight > low:
+            view = app.view_functions.get(request.endpoint)
+            shed = getattr(view, '_priority', None) == 'low'
+        if shed:
+            app.extensions['ratelimit'].count('shed')
+            return _too_many('Server busy', 503, config['ADMISSION_RETRY_AFTER'])
+
+    def _release(self, exc=None):
+        token = request.environ.pop('ratelimit.admitted', None)
+        if token is not None:
+            current_app.extensions['ratelimit'].store.leave(token)
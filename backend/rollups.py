@@ -0,0 +1,319 @@
+# backend/rollups.py
+# Hourly and daily activity counters for admin analytics. Every flush
+# appends what it changes to activity_rollup_delta, on the same connection,
+# so the deltas commit (or roll back) with the rows they describe. Writers
+# only ever insert: no counter row is shared, so requests writing in the
+# same hour never wait on each other. fold() adds the deltas into
+# activity_rollup and removes them; reads sum both. `flask backfill-rollups`
+# rebuilds them from the raw rows, archived ones included.
+#
+# Every event is bucketed by the created_at of the row it belongs to (an
+# accepted swap counts towards the bucket the swap was requested in), and
+# deletes and task category changes take back what the row added, so the
+# incremental path ends up where a backfill would. Archiving changes
+# nothing: the backfill reads the archive tables too.
+from collections import defaultdict
+from datetime import datetime
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, func, literal, or_, select, delete, insert, text, union_all
+from sqlalchemy.orm import attributes
+from sqlalchemy.orm.util import identity_key
+
+import background
+from extensions import db
+from models import (
+    Task, SwapRequest, Review, TaskArchive, SwapRequestArchive, ReviewArchive,
+    ActivityRollup, ActivityRollupDelta,
+)
+
+BUCKETS = ('hour', 'day')
+METRICS = ('tasks_created', 'swaps_created', 'swaps_accepted', 'review_rating')
+
+
+def truncate(moment, bucket):
+    if bucket == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _category(session, connection, task_id):
+    task = session.identity_map.get(identity_key(Task, task_id))
+    if task is not None:
+        return task.category or ''
+    return connection.execute(select(Task.category).where(Task.id == task_id)).scalar() or ''
+
+
+def _events(session, connection):
+    """(metric, created_at, dimension, count, total) for this flush."""
+    for obj in session.new:
+        if isinstance(obj, Task):
+            yield 'tasks_created', obj.created_at, obj.category or '', 1, 0.0
+        elif isinstance(obj, SwapRequest):
+            yield 'swaps_created', obj.created_at, '', 1, 0.0
+            if obj.status == 'accepted':
+                yield 'swaps_accepted', obj.created_at, '', 1, 0.0
+        elif isinstance(obj, Review):
+            yield ('review_rating', obj.created_at,
+                   _category(session, connection, obj.task_id), 1, float(obj.rating))
+
+    for obj in session.dirty:
+        if not isinstance(obj, SwapRequest):
+            continue
+        history = attributes.get_history(obj, 'status')
+        if not history.has_changes():
+            continue
+        was = 'accepted' in history.deleted
+        now = obj.status == 'accepted'
+        if was != now:
+            yield 'swaps_accepted', obj.created_at, '', 1 if now else -1, 0.0
+
+
+def _matching(model, ids, task_ids):
+    clauses = []
+    if ids:
+        clauses.append(model.id.in_(ids))
+    if task_ids:
+        clauses.append(model.task_id.in_(task_ids))
+    return or_(*clauses) if clauses else None
+
+
+def removed_events(connection, task_ids=(), swap_ids=(), review_ids=()):
+    """Events taking back the given rows, and the swaps and reviews that the
+    database cascade-deletes with ``task_ids``. Must run before the delete."""
+    task_ids, events = list(task_ids), []
+    if task_ids:
+        for created_at, category in connection.execute(
+                select(Task.created_at, Task.category).where(Task.id.in_(task_ids))):
+            events.append(('tasks_created', created_at, category or '', -1, 0.0))
+    swaps = _matching(SwapRequest, list(swap_ids), task_ids)
+    if swaps is not None:
+        for created_at, status in connection.execute(
+                select(SwapRequest.created_at, SwapRequest.status).where(swaps)):
+            events.append(('swaps_created', created_at, '', -1, 0.0))
+            if status == 'accepted':
+                events.append(('swaps_accepted', created_at, '', -1, 0.0))
+    reviews = _matching(Review, list(review_ids), task_ids)
+    if reviews is not None:
+        for created_at, category, rating in connection.execute(
+                select(Review.created_at, Task.category, Review.rating)
+                .join(Task, Task.id == Review.task_id).where(reviews)):
+            events.append(('review_rating', created_at, category or '', -1, -float(rating)))
+    return events
+
+
+def recategorized_events(connection, moves):
+    """Events moving tasks, and the ratings of their reviews, to another
+    category. ``moves`` is {task_id: (created_at, old, new)}."""
+    events = []
+    for created_at, old, new in moves.values():
+        events += [('tasks_created', created_at, old or '', -1, 0.0),
+                   ('tasks_created', created_at, new or '', 1, 0.0)]
+    if moves:
+        for task_id, created_at, rating in connection.execute(
+                select(Review.task_id, Review.created_at, Review.rating)
+                .where(Review.task_id.in_(list(moves)))):
+            _, old, new = moves[task_id]
+            events += [('review_rating', created_at, old or '', -1, -float(rating)),
+                       ('review_rating', created_at, new or '', 1, float(rating))]
+    return events
+
+
+def record_events(connection, events):
+    """Add ``(metric, created_at, dimension, count, total)`` events to both
+    bucket sizes. Used by the flush hooks and by writers that bypass the ORM."""
+    deltas = defaultdict(lambda: [0, 0.0])
+    for metric, created_at, dimension, count, total in events:
+        created_at = created_at or datetime.utcnow()
+        for bucket in BUCKETS:
+            delta = deltas[(metric, bucket, truncate(created_at, bucket), dimension)]
+            delta[0] += count
+            delta[1] += total
+    rows = [dict(metric=metric, bucket=bucket, bucket_start=start, dimension=dimension,
+                 count=count, total=total)
+            for (metric, bucket, start, dimension), (count, total) in deltas.items()
+            if count or total]
+    if rows:
+        connection.execute(insert(ActivityRollupDelta), rows)
+
+
+@event.listens_for(db.session, 'before_flush')
+def collect_removals(session, flush_context, instances):
+    # Deleted rows and the old category of a task are only in the database
+    # until this flush, so work out what they take back now.
+    deleted = defaultdict(list)
+    for obj in session.deleted:
+        if isinstance(obj, (Task, SwapRequest, Review)):
+            deleted[type(obj)].append(obj.id)
+    moves = {}
+    for obj in session.dirty:
+        if isinstance(obj, Task):
+            history = attributes.get_history(obj, 'category')
+            if history.deleted and (history.deleted[0] or '') != (obj.category or ''):
+                moves[obj.id] = (obj.created_at, history.deleted[0], obj.category)
+    if deleted or moves:
+        connection = session.connection()
+        session.info.setdefault('rollup_events', []).extend(
+            removed_events(connection, deleted[Task], deleted[SwapRequest], deleted[Review])
+            + recategorized_events(connection, moves))
+
+
+@event.listens_for(db.session, 'after_flush')
+def record_activity(session, flush_context):
+    connection = session.connection()
+    record_events(connection, session.info.pop('rollup_events', [])
+                  + list(_events(session, connection)))
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_removals(session):
+    session.info.pop('rollup_events', None)
+
+
+# -----------------------------
+# Folding
+# -----------------------------
+_COLUMNS = 'metric, bucket, bucket_start, dimension'
+_UPSERT = (f"ON CONFLICT ({_COLUMNS}) DO UPDATE SET "
+           "count = activity_rollup.count + excluded.count, "
+           "total = activity_rollup.total + excluded.total")
+# Deleting and adding in one statement: a delta committed meanwhile is
+# either moved or left for the next fold, never lost.
+PG_FOLD = [
+    f"WITH moved AS (DELETE FROM activity_rollup_delta RETURNING {_COLUMNS}, count, total) "
+    f"INSERT INTO activity_rollup ({_COLUMNS}, count, total) "
+    f"SELECT {_COLUMNS}, sum(count), sum(total) FROM moved GROUP BY 1, 2, 3, 4 {_UPSERT}",
+]
+# SQLite has one writer at a time, so nothing can slip in between
+SQLITE_FOLD = [
+    f"INSERT INTO activity_rollup ({_COLUMNS}, count, total) "
+    f"SELECT {_COLUMNS}, sum(count), sum(total) FROM activity_rollup_delta "
+    f"WHERE true GROUP BY 1, 2, 3, 4 {_UPSERT}",
+    "DELETE FROM activity_rollup_delta",
+]
+
+
+def fold():
+    """Add the pending deltas into activity_rollup."""
+    dialect = db.session.get_bind().dialect.name
+    for statement in PG_FOLD if dialect == 'postgresql' else SQLITE_FOLD:
+        db.session.execute(text(statement))
+    db.session.commit()
+
+
+_fold_lock = threading.Lock()
+_folded_at = 0.0
+
+
+def _fold_soon():
+    """Fold on the background thread at most every ROLLUPS_FOLD_INTERVAL
+    seconds per process, so the delta table stays short."""
+    global _folded_at
+    app = current_app._get_current_object()
+    with _fold_lock:
+        if time.monotonic() - _folded_at < app.config['ROLLUPS_FOLD_INTERVAL']:
+            return
+        _folded_at = time.monotonic()
+    background.submit(app, fold)
+
+
+# -----------------------------
+# Backfill
+# -----------------------------
+# Rows behind each metric, hot and archived: archiving moves rows out of the
+# hot tables, and a rebuild from those alone would drop their history.
+SOURCES = {
+    'tasks_created': [
+        dict(model=Task, dimension=Task.category),
+        dict(model=TaskArchive, dimension=TaskArchive.category),
+    ],
+    'swaps_created': [dict(model=SwapRequest), dict(model=SwapRequestArchive)],
+    'swaps_accepted': [
+        dict(model=SwapRequest, where=SwapRequest.status == 'accepted'),
+        dict(model=SwapRequestArchive, where=SwapRequestArchive.status == 'accepted'),
+    ],
+    'review_rating': [
+        dict(model=Review, dimension=Task.category, total=Review.rating,
+             join=(Task, Task.id == Review.task_id)),
+        # Reviews are archived together with their task
+        dict(model=ReviewArchive, dimension=TaskArchive.category, total=ReviewArchive.rating,
+             join=(TaskArchive, TaskArchive.id == ReviewArchive.task_id)),
+    ],
+}
+
+
+def _bucket_expr(dialect, bucket, column):
+    if dialect == 'postgresql':
+        return func.date_trunc(bucket, column)
+    fmt = '%Y-%m-%d %H:00:00' if bucket == 'hour' else '%Y-%m-%d 00:00:00'
+    return func.strftime(fmt, column)
+
+
+def _events_query(sources):
+    """(created_at, dim, total) of every row behind a metric."""
+    parts = []
+    for source in sources:
+        model = source['model']
+        dimension, total = source.get('dimension'), source.get('total')
+        query = select(
+            model.created_at.label('created_at'),
+            (func.coalesce(dimension, '') if dimension is not None else literal('')).label('dim'),
+            (total if total is not None else literal(0.0)).label('total'),
+        ).select_from(model).where(model.created_at.isnot(None))
+        if 'join' in source:
+            query = query.join(*source['join'])
+        if 'where' in source:
+            query = query.where(source['where'])
+        parts.append(query)
+    return union_all(*parts).subquery()
+
+
+def backfill(metrics=METRICS):
+    """Recompute the given metrics from the raw rows, one GROUP BY per bucket."""
+    dialect = db.session.get_bind().dialect.name
+    for metric in metrics:
+        events = _events_query(SOURCES[metric])
+
+        db.session.execute(delete(ActivityRollup).where(ActivityRollup.metric == metric))
+        db.session.execute(delete(ActivityRollupDelta).where(ActivityRollupDelta.metric == metric))
+        for bucket in BUCKETS:
+            start = _bucket_expr(dialect, bucket, events.c.created_at).label('start')
+            query = select(
+                start, events.c.dim, func.count(), func.coalesce(func.sum(events.c.total), 0.0)
+            ).group_by(start, events.c.dim)
+
+            rows = [
+                dict(metric=metric, bucket=bucket, dimension=dim_value,
+                     bucket_start=start_value if isinstance(start_value, datetime)
+                     else datetime.fromisoformat(start_value),
+                     count=count, total=float(total_value))
+                for start_value, dim_value, count, total_value in db.session.execute(query)
+            ]
+            if rows:
+                db.session.execute(insert(ActivityRollup), rows)
+        db.session.commit()
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def series(metric, bucket, start, end, dimension=None):
+    """[(bucket_start, count, total)] summed over dimensions unless one is given."""
+    parts = []
+    for model in (ActivityRollup, ActivityRollupDelta):
+        part = select(model.bucket_start, model.count, model.total) \
+            .where(model.metric == metric, model.bucket == bucket,
+                   model.bucket_start >= start, model.bucket_start < end)
+        if dimension is not None:
+            part = part.where(model.dimension == dimension)
+        parts.append(part)
+    # Folded counts plus the deltas not folded yet
+    rows = union_all(*parts).subquery()
+    query = select(rows.c.bucket_start, func.sum(rows.c.count), func.sum(rows.c.total)) \
+        .group_by(rows.c.bucket_start).having(func.sum(rows.c.count) != 0) \
+        .order_by(rows.c.bucket_start)
+    result = db.session.execute(query).all()
+    _fold_soon()
+    return result
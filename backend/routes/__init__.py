@@ -0,0 +1,59 @@
+# backend/routes/__init__.py
+from flask import Blueprint
+from werkzeug.utils import cached_property, import_string
+
+
+class LazyView:
+    """View that imports its target on first call, so rarely used modules
+    (CSV export, admin statistics, profiling) stay out of worker and CLI
+    startup."""
+
+    # Read by Flask in add_url_rule; defined here so registration does not
+    # trigger the import.
+    methods = None
+    required_methods = ()
+    provide_automatic_options = None
+
+    def __init__(self, import_name):
+        self.__module__, self.__name__ = import_name.rsplit('.', 1)
+        self.import_name = import_name
+
+    @cached_property
+    def view(self):
+        return import_string(self.import_name)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+    def __getattr__(self, name):
+        # Expose per-view attributes such as _compress_level
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.view, name)
+
+
+reports_bp = Blueprint('reports', __name__, url_prefix='/admin')
+for rule, view, methods in [
+    ('/stats/users', 'reports.admin_user_stats', ['GET']),
+    ('/stats/tasks', 'reports.admin_task_stats', ['GET']),
+    ('/stats/timeseries', 'reports.admin_timeseries', ['GET']),
+    ('/export/users', 'reports.admin_export_users', ['GET']),
+    ('/export/tasks', 'reports.admin_export_tasks', ['GET']),
+    ('/export/snapshot/<table>', 'reports.admin_export_snapshot', ['GET']),
+    ('/import/<kind>', 'reports.admin_import', ['POST']),
+    ('/import/jobs/<int:job_id>', 'reports.admin_import_job', ['GET']),
+    ('/profiles', 'profiles.admin_list_profiles', ['GET']),
+    ('/profiles', 'profiles.admin_arm_profile', ['POST']),
+    ('/profiles/<endpoint>', 'profiles.admin_download_profile', ['GET']),
+    ('/profiles/<endpoint>', 'profiles.admin_delete_profile', ['DELETE']),
+]:
+    reports_bp.add_url_rule(rule, view.split('.')[1], LazyView(f'routes.{view}'),
+                            methods=methods)
+
+
+def register_blueprints(app):
+    from routes import auth, users, tasks, swaps, reviews, admin, changes, batch
+
+    for module in (auth, users, tasks, swaps, reviews, admin, changes, batch):
+        app.register_blueprint(module.bp)
+    app.register_blueprint(reports_bp)
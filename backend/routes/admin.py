@@ -0,0 +1,121 @@
+from flask import Blueprint, current_app, request, jsonify
+
+import background
+from decorators import admin_required
+from deletion import tombstone, purge_user
+from extensions import db
+from metrics import generate_password_hash
+from archive import include_archived
+from models import User, Task, TaskArchive, SwapRequest, Review
+
+bp = Blueprint('admin', __name__, url_prefix='/admin')
+
+
+# -----------------------------
+# ADMIN ROUTES
+# -----------------------------
+# User management
+@bp.route('/users', methods=['GET'])
+@admin_required
+def admin_list_users():
+    users = User.query.filter(User.deleted_at.is_(None)).all()
+    return jsonify([u.serialize() for u in users])
+
+
+@bp.route('/users/<int:user_id>', methods=['PUT'])
+@admin_required
+def admin_update_user(user_id):
+    user = User.query.get_or_404(user_id)
+    data = request.get_json()
+    if 'role' in data:
+        user.role = data['role']
+    if 'skills' in data:
+        user.skills = data['skills']
+    if 'password' in data:
+        user.password_hash = generate_password_hash(data['password'])
+    db.session.commit()
+    return jsonify(user.serialize())
+
+
+@bp.route('/users/<int:user_id>', methods=['DELETE'])
+@admin_required
+def admin_delete_user(user_id):
+    user = User.query.get_or_404(user_id)
+    if user.is_deleted():
+        return jsonify({'message': 'User deleted'}), 202
+    # Hide the account now; its rows are purged in chunks in the background
+    # (or by `flask purge-deleted` if this worker goes away first).
+    tombstone(user)
+    if current_app.config['PURGE_IN_BACKGROUND']:
+        background.submit(current_app._get_current_object(), purge_user, user_id)
+    return jsonify({'message': 'User deleted'}), 202
+
+
+# Task management
+@bp.route('/tasks', methods=['GET'])
+@admin_required
+def admin_list_tasks():
+    tasks = Task.query.all()
+    if include_archived(request.args):
+        tasks += TaskArchive.query.all()
+    return jsonify([t.serialize() for t in tasks])
+
+
+@bp.route('/tasks/<int:task_id>', methods=['PUT'])
+@admin_required
+def admin_update_task(task_id):
+    task = Task.query.get_or_404(task_id)
+    data = request.get_json()
+    for field in ['title', 'description', 'status', 'assigned_to', 'category']:
+        if field in data:
+            setattr(task, field, data[field])
+    db.session.commit()
+    return jsonify(task.serialize())
+
+
+@bp.route('/tasks/<int:task_id>', methods=['DELETE'])
+@admin_required
+def admin_delete_task(task_id):
+    task = Task.query.get_or_404(task_id)
+    db.session.delete(task)
+    db.session.commit()
+    return jsonify({'message': 'Task deleted'})
+
+
+# Swap override
+@bp.route('/swaps/<int:swap_id>/override', methods=['POST'])
+@admin_required
+def admin_override_swap(swap_id):
+    swap = SwapRequest.query.get_or_404(swap_id)
+    data = request.get_json()
+    if data.get('action') == 'accept':
+        swap.status = 'accepted'
+        swap.task.assigned_to = swap.requester_id
+    elif data.get('action') == 'reject':
+        swap.status = 'rejected'
+    else:
+        return jsonify({'error': 'Invalid action'}), 400
+    db.session.commit()
+    return jsonify(swap.serialize())
+
+
+# Review moderation
+@bp.route('/reviews/<int:review_id>', methods=['DELETE'])
+@admin_required
+def admin_delete_review(review_id):
+    review = Review.query.get_or_404(review_id)
+    db.session.delete(review)
+    db.session.commit()
+    return jsonify({'message': 'Review deleted'})
+
+
+# Announcement
+@bp.route('/announce', methods=['POST'])
+@admin_required
+def admin_announce():
+    data = request.get_json()
+    message = data.get('message')
+    if not message:
+        return jsonify({'error': 'Message required'}), 400
+    # For simplicity, just return message; you can extend to email/push notifications
+    return jsonify({'announcement': message, 'status': 'sent'})
@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+import time
+
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+
+from extensions import db
+from models import User
+
+bp = Blueprint('batch', __name__)
+
+READ_METHODS = ('GET', 'HEAD')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(app):
+    # Created on first use so every forked worker owns its threads
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=app.config['BATCH_WORKERS'],
+                                           thread_name_prefix='batch')
+        return _executor
+
+
+def _result(status, body):
+    return {'status': status, 'body': body}
+
+
+def _timed_out():
+    return _result(504, {'error': 'Batch time limit exceeded'})
+
+
+def _dispatch(app, sub, headers, environ, user, deadline):
+    """Run one sub-request through the full Flask pipeline in its own
+    app context (and so its own database session)."""
+    # Reads still queued when the batch gave up are not started at all
+    if time.monotonic() >= deadline:
+        return _timed_out()
+    with app.app_context():
+        # The caller was already loaded by /batch; seed this session with it
+        # so the views' User.query.get(identity) is an identity-map hit.
+        if user is not None:
+            db.session.merge(user, load=False)
+        with app.test_request_context(sub['path'], method=sub['method'],
+                                      json=sub.get('body'), headers=headers,
+                                      environ_base=environ):
+            try:
+                response = app.full_dispatch_request()
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception('Batch sub-request %s %s failed',
+                                             sub['method'], sub['path'])
+                return _result(500, {'error': 'Internal server error'})
+            body = response.get_json(silent=True)
+            if body is None:
+                body = response.get_data(as_text=True)
+            return _result(response.status_code, body)
+
+
+def _validate(subs, limit):
+    if not isinstance(subs, list) or not subs:
+        return 'requests must be a non-empty list'
+    if len(subs) > limit:
+        return f'At most {limit} sub-requests per batch'
+    for sub in subs:
+        if not isinstance(sub, dict) or not isinstance(sub.get('path'), str) \
+                or not sub['path'].startswith('/'):
+            return 'Each sub-request needs a path starting with /'
+        sub['method'] = str(sub.get('method', 'GET')).upper()
+        if sub['path'].split('?', 1)[0].rstrip('/') == '/batch':
+            return 'Nested batches are not allowed'
+    return None
+
+
+# -----------------------------
+# Batch Route
+# -----------------------------
+@bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch():
+    """Execute several API calls in one round trip.
+
+    Body: {"requests": [{"method": "GET", "path": "/tasks", "body": {...}}, ...]}
+    Consecutive reads run concurrently; a write waits for everything before
+    it and blocks everything after it, so the batch keeps its order.
+    """
+    app = current_app._get_current_object()
+    data = request.get_json(silent=True) or {}
+    subs = data.get('requests')
+    error = _validate(subs, app.config['BATCH_MAX_REQUESTS'])
+    if error:
+        return jsonify({'error': error}), 400
+
+    user = User.query.get(get_jwt_identity())
+    headers = {'Authorization': request.headers.get('Authorization', '')}
+    if 'X-Forwarded-For' in request.headers:
+        headers['X-Forwarded-For'] = request.headers['X-Forwarded-For']
+    environ = {
+        # Sub-requests are rate limited as the caller, not as one shared client
+        'REMOTE_ADDR': request.remote_addr,
+        # Already admitted as part of this request, so admission control
+        # does not count them again
+        'batch.sub_request': True,
+        # The token checked above, for the routes' own @jwt_required
+        'batch.jwt': (request.headers.get('Authorization', '').partition(' ')[2], get_jwt()),
+    }
+    deadline = time.monotonic() + app.config['BATCH_TIMEOUT']
+    executor = _get_executor(app)
+    results = [None] * len(subs)
+
+    def run_reads(indexes):
+        futures = {executor.submit(_dispatch, app, subs[i], headers, environ, user, deadline): i
+                   for i in indexes}
+        done, _ = wait(futures, timeout=max(0, deadline - time.monotonic()))
+        for future, i in futures.items():
+            if future in done:
+                results[i] = future.result()
+            else:
+                # Drop it from the queue if it hasn't started; one already
+                # running finishes on its own and its result is discarded
+                future.cancel()
+                results[i] = _timed_out()
+
+    reads = []
+    for i, sub in enumerate(subs):
+        if sub['method'] in READ_METHODS:
+            reads.append(i)
+            continue
+        if reads:
+            run_reads(reads)
+            reads = []
+        results[i] = _dispatch(app, sub, headers, environ, user, deadline)
+    if reads:
+        run_reads(reads)
+
+    return jsonify(results)
@@ -0,0 +1,42 @@
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from changes import changes_since, head, oldest_cursor
+from models import User
+
+bp = Blueprint('changes', __name__)
+
+
+# -----------------------------
+# Delta sync
+# -----------------------------
+@bp.route('/changes', methods=['GET'])
+@jwt_required()
+def list_changes():
+    current_user = User.query.get(get_jwt_identity())
+
+    # Without a cursor, hand out the settled head so the client can do one
+    # full fetch and then sync from there.
+    settle = current_app.config['CHANGES_SETTLE_SECONDS']
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify({'cursor': head(settle), 'changes': [], 'has_more': False})
+
+    oldest = oldest_cursor()
+    if oldest is not None and since < oldest - 1:
+        return jsonify({'error': 'Cursor expired, full resync required'}), 410
+
+    limit = max(1, min(request.args.get('limit', 500, type=int), 1000))
+    compact = request.args.get('compact', '').lower() in ('1', 'true', 'yes')
+    entries = changes_since(
+        since,
+        user=None if current_user.is_admin() else current_user,
+        compact=compact,
+        limit=limit,
+        settle=settle,
+    )
+    return jsonify({
+        'cursor': entries[-1].id if entries else since,
+        'changes': [e.serialize() for e in entries],
+        'has_more': len(entries) == limit,
+    })
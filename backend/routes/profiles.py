@@ -0,0 +1,99 @@
+# Admin views for the request profiler (profiling.py). Lazily imported, see
+# routes/__init__.py.
+import json
+from datetime import datetime
+
+from flask import current_app, jsonify, request
+
+from decorators import admin_required
+from extensions import profiler
+from profiling import MODES, to_collapsed, to_speedscope, merge_pstats
+
+
+def _enabled():
+    return current_app.config['PROFILING_ENABLED']
+
+
+def _attachment(body, filename, mimetype):
+    response = current_app.response_class(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# List armed routes and collected profiles
+@admin_required
+def admin_list_profiles():
+    if not _enabled():
+        return jsonify({'error': 'Profiling is disabled'}), 404
+    targets = {
+        endpoint: dict(target, until=datetime.utcfromtimestamp(target['until']).isoformat())
+        for endpoint, target in profiler.targets().items()
+    }
+    profiles = [{
+        'endpoint': endpoint,
+        'requests': profile['requests'],
+        'seconds': round(profile['seconds'], 6),
+        'samples': sum(profile['stacks'].values()),
+        'formats': ['collapsed', 'speedscope'] + (['pstats'] if profile['pstats_files'] else []),
+    } for endpoint, profile in profiler.profiles().items()]
+    return jsonify({'armed': targets, 'profiles': profiles})
+
+
+# Arm a route: {"endpoint": "tasks.list_tasks", "mode": "sample", "rate": 0.1, "seconds": 300}
+@admin_required
+def admin_arm_profile():
+    if not _enabled():
+        return jsonify({'error': 'Profiling is disabled'}), 404
+    data = request.get_json(silent=True) or {}
+    endpoint = data.get('endpoint')
+    if endpoint not in current_app.view_functions:
+        return jsonify({'error': 'Unknown endpoint'}), 400
+    mode = data.get('mode', 'sample')
+    if mode not in MODES:
+        return jsonify({'error': f'mode must be one of {", ".join(MODES)}'}), 400
+    try:
+        rate = float(data.get('rate', 1.0))
+        seconds = int(data.get('seconds', 300))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'rate and seconds must be numbers'}), 400
+    if not 0 < rate <= 1 or not 0 < seconds <= 3600:
+        return jsonify({'error': 'rate must be in (0, 1] and seconds in (0, 3600]'}), 400
+
+    target = profiler.arm(endpoint, mode, rate, seconds)
+    return jsonify({
+        'endpoint': endpoint,
+        **target,
+        'until': datetime.utcfromtimestamp(target['until']).isoformat(),
+    }), 201
+
+
+# Download: ?format=collapsed (default), speedscope or pstats
+@admin_required
+def admin_download_profile(endpoint):
+    if not _enabled():
+        return jsonify({'error': 'Profiling is disabled'}), 404
+    profile = profiler.profiles().get(endpoint)
+    if profile is None:
+        return jsonify({'error': 'No profile for this endpoint'}), 404
+
+    fmt = request.args.get('format', 'collapsed')
+    if fmt == 'collapsed':
+        return _attachment(to_collapsed(profile['stacks']), f'{endpoint}.collapsed', 'text/plain')
+    if fmt == 'speedscope':
+        body = json.dumps(to_speedscope(endpoint, profile['stacks'], profile['interval']))
+        return _attachment(body, f'{endpoint}.speedscope.json', 'application/json')
+    if fmt == 'pstats':
+        if not profile['pstats_files']:
+            return jsonify({'error': 'No cprofile runs for this endpoint'}), 404
+        return _attachment(merge_pstats(profile['pstats_files']), f'{endpoint}.prof',
+                           'application/octet-stream')
+    return jsonify({'error': 'format must be collapsed, speedscope or pstats'}), 400
+
+
+# Disarm a route and drop what was collected for it
+@admin_required
+def admin_delete_profile(endpoint):
+    if not _enabled():
+        return jsonify({'error': 'Profiling is disabled'}), 404
+    profiler.disarm(endpoint)
+    return jsonify({'message': 'Profile deleted'})
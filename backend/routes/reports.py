@@ -0,0 +1,212 @@
+# Rarely used admin views (statistics, CSV exports, snapshots and bulk
+# import). This module is only imported on the first request to one of its
+# URLs, see routes/__init__.py.
+import csv
+import io
+from datetime import datetime, timedelta
+
+from flask import current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import get_jwt_identity
+
+import importer
+import snapshot
+from archive import include_archived
+from compression import compress_level
+from decorators import admin_required
+from extensions import db, limiter
+from models import User, Task, ImportJob
+from rollups import series, truncate
+
+
+# Statistics
+@admin_required
+@limiter.low_priority
+def admin_user_stats():
+    total_users = User.query.count()
+    admins = User.query.filter_by(role='admin').count()
+    return jsonify({"total_users": total_users, "admins": admins})
+
+
+@admin_required
+@limiter.low_priority
+def admin_task_stats():
+    total_tasks = Task.query.count()
+    completed = Task.query.filter_by(status='completed').count()
+    open_tasks = Task.query.filter_by(status='open').count()
+    assigned = Task.query.filter(Task.assigned_to.isnot(None)).count()
+    return jsonify({
+        "total_tasks": total_tasks,
+        "completed": completed,
+        "open": open_tasks,
+        "assigned": assigned
+    })
+
+
+# Time series from the rollup tables. Rates and averages are derived from
+# the stored counts/totals: swap_acceptance_rate = swaps_accepted /
+# swaps_created, review_rating_avg = review_rating total / count.
+TIMESERIES_METRICS = {
+    'tasks_created', 'swaps_created', 'swaps_accepted', 'reviews',
+    'review_rating_avg', 'swap_acceptance_rate',
+}
+
+
+def _parse_time(value, default):
+    return datetime.fromisoformat(value) if value else default
+
+
+@admin_required
+@limiter.low_priority
+def admin_timeseries():
+    metric = request.args.get('metric', 'tasks_created')
+    bucket = request.args.get('bucket', 'day')
+    if metric not in TIMESERIES_METRICS:
+        return jsonify({'error': f'Unknown metric, expected one of {sorted(TIMESERIES_METRICS)}'}), 400
+    if bucket not in ('hour', 'day'):
+        return jsonify({'error': 'bucket must be hour or day'}), 400
+    try:
+        end = _parse_time(request.args.get('to'), datetime.utcnow())
+        start = _parse_time(request.args.get('from'), end - timedelta(days=30))
+    except ValueError:
+        return jsonify({'error': 'from/to must be ISO 8601 dates'}), 400
+    start, category = truncate(start, bucket), request.args.get('category')
+
+    if metric == 'swap_acceptance_rate':
+        created = {s: c for s, c, _ in series('swaps_created', bucket, start, end)}
+        accepted = {s: c for s, c, _ in series('swaps_accepted', bucket, start, end)}
+        points = [(s, accepted.get(s, 0) / c) for s, c in sorted(created.items()) if c]
+    elif metric in ('reviews', 'review_rating_avg'):
+        rows = series('review_rating', bucket, start, end, category)
+        points = [(s, c if metric == 'reviews' else t / c) for s, c, t in rows if c]
+    else:
+        dimension = category if metric == 'tasks_created' else None
+        points = [(s, c) for s, c, _ in series(metric, bucket, start, end, dimension)]
+
+    return jsonify({
+        'metric': metric,
+        'bucket': bucket,
+        'points': [{'t': s.isoformat(), 'value': v} for s, v in points],
+    })
+
+
+# CSV exports are streamed row by row so the compressor can work on
+# them incrementally instead of holding the whole dump in memory.
+def _csv_rows(header, rows):
+    si = io.StringIO()
+    cw = csv.writer(si)
+    cw.writerow(header)
+    yield si.getvalue()
+    for row in rows:
+        si.seek(0)
+        si.truncate(0)
+        cw.writerow(row)
+        yield si.getvalue()
+
+
+# Export users as CSV
+@admin_required
+@limiter.low_priority
+@compress_level(9)
+def admin_export_users():
+    users = User.query.yield_per(1000)
+    rows = ([u.id, u.name, u.email, u.role, u.skills, u.rating] for u in users)
+    output = _csv_rows(['ID', 'Name', 'Email', 'Role', 'Skills', 'Rating'], rows)
+    return current_app.response_class(stream_with_context(output), mimetype='text/csv')
+
+
+# Export tasks as CSV
+@admin_required
+@limiter.low_priority
+@compress_level(9)
+def admin_export_tasks():
+    tasks = Task.query.yield_per(1000)
+    rows = ([t.id, t.title, t.category, t.status, t.created_by, t.assigned_to] for t in tasks)
+    output = _csv_rows(['ID', 'Title', 'Category', 'Status', 'Created_By', 'Assigned_To'], rows)
+    return current_app.response_class(stream_with_context(output), mimetype='text/csv')
+
+
+# One table of a dataset snapshot (see snapshot.py). ?since= (ISO 8601,
+# UTC) makes it incremental; X-Snapshot-Until is the next call's since.
+@admin_required
+@limiter.low_priority
+@compress_level(0)  # already compressed
+def admin_export_snapshot(table):
+    if table not in snapshot.TABLES:
+        return jsonify({'error': f'table must be one of {", ".join(snapshot.TABLES)}'}), 404
+    fmt = request.args.get('format') or snapshot.default_format()
+    if fmt not in snapshot.FORMATS:
+        return jsonify({'error': f'format must be one of {", ".join(snapshot.FORMATS)}'}), 400
+    if not snapshot.available(fmt):
+        return jsonify({'error': f'{fmt} is not available on this server, use ndjson'}), 400
+    try:
+        since = _parse_time(request.args.get('since'), None)
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO 8601 date'}), 400
+
+    config = current_app.config
+    until = snapshot.window_end(config['SNAPSHOT_SETTLE_SECONDS'])
+    output = snapshot.stream(
+        table, fmt, since=since, until=until,
+        batch_size=config['SNAPSHOT_BATCH_SIZE'],
+        include_archived=include_archived(request.args),
+    )
+    response = current_app.response_class(stream_with_context(output),
+                                          mimetype=snapshot.MIMETYPES[fmt])
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename="{table}{snapshot.EXTENSIONS[fmt]}"'
+    response.headers['X-Snapshot-Until'] = until.isoformat()
+    return response
+
+
+# Bulk import
+IMPORT_FORMATS = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson', 'application/json': 'ndjson'}
+
+
+@admin_required
+@limiter.low_priority
+def admin_import(kind):
+    """Stream a CSV or NDJSON upload into users or tasks.
+
+    Send the file as the raw body (or as multipart field "file"). Pass
+    ?job=<id> to resume an interrupted import from its last committed row.
+    Existing users keep their password and role unless
+    ?overwrite_credentials=true is given.
+    """
+    if kind not in ('users', 'tasks'):
+        return jsonify({'error': 'kind must be users or tasks'}), 404
+    upload = request.files.get('file')
+    fmt = request.args.get('format') or IMPORT_FORMATS.get(
+        upload.mimetype if upload else request.mimetype)
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Send text/csv or application/x-ndjson, or pass ?format='}), 400
+
+    job_id = request.args.get('job', type=int)
+    if job_id:
+        job = ImportJob.query.get_or_404(job_id)
+        if job.kind != kind or job.status == 'done':
+            return jsonify({'error': 'Job cannot be resumed'}), 409
+        job.status = 'running'
+    else:
+        job = ImportJob(kind=kind, created_by=get_jwt_identity())
+        db.session.add(job)
+    db.session.commit()
+
+    config = current_app.config
+    errors = importer.run(
+        job, upload.stream if upload else request.stream, fmt,
+        batch_size=config['IMPORT_BATCH_SIZE'],
+        max_errors=config['IMPORT_MAX_ERRORS'],
+        hash_workers=config['IMPORT_HASH_WORKERS'],
+        overwrite_credentials=request.args.get('overwrite_credentials', '').lower()
+        in ('1', 'true', 'yes'),
+    )
+    return jsonify({
+        'job': job.serialize(),
+        'errors': errors,
+        'errors_truncated': job.rows_failed > len(errors),
+    })
+
+
+@admin_required
+def admin_import_job(job_id):
+    return jsonify(ImportJob.query.get_or_404(job_id).serialize())
@@ -0,0 +1,50 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from extensions import db, limiter
+from archive import include_archived
+from idempotency import idempotent
+from models import Review, ReviewArchive
+from ratelimit import by_ip, by_identity
+
+bp = Blueprint('reviews', __name__)
+
+
+# -----------------------------
+# Review Routes
+# -----------------------------
+@bp.route('/reviews', methods=['POST'])
+@jwt_required()
+@limiter.limit('120/minute', key=by_ip)
+@limiter.limit('20/minute', key=by_identity)
+@idempotent
+def create_review():
+    data = request.get_json()
+    current_user_id = get_jwt_identity()
+    review = Review(
+        reviewer_id=current_user_id,
+        reviewee_id=data['reviewee_id'],
+        task_id=data['task_id'],
+        rating=data['rating'],
+        comment=data.get('comment', '')
+    )
+    db.session.add(review)
+    db.session.commit()
+    return jsonify(review.serialize()), 201
+
+
+@bp.route('/reviews', methods=['GET'])
+@jwt_required()
+def list_reviews():
+    task_id = request.args.get('task_id')
+    user_id = request.args.get('user_id')
+    models = [Review, ReviewArchive] if include_archived(request.args) else [Review]
+    reviews = []
+    for model in models:
+        query = model.query
+        if task_id:
+            query = query.filter_by(task_id=task_id)
+        if user_id:
+            query = query.filter_by(reviewee_id=user_id)
+        reviews += query.all()
+    return jsonify([r.serialize() for r in reviews])
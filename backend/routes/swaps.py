@@ -0,0 +1,109 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db, limiter
+from archive import include_archived
+from idempotency import idempotent
+from models import Task, SwapRequest, SwapRequestArchive
+from ratelimit import by_ip, by_identity
+
+bp = Blueprint('swaps', __name__)
+
+
+# -----------------------------
+# SwapRequest Routes
+# -----------------------------
+@bp.route('/swap', methods=['POST'])
+@jwt_required()
+@limiter.limit('120/minute', key=by_ip)
+@limiter.limit('30/minute', key=by_identity)
+@idempotent
+def create_swap_request():
+    data = request.get_json()
+    current_user_id = get_jwt_identity()
+    task = Task.query.get_or_404(data['task_id'])
+    swap = SwapRequest(
+        task_id=task.id,
+        requester_id=current_user_id,
+        owner_id=task.created_by
+    )
+    db.session.add(swap)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'A pending request for this task already exists'}), 409
+    return jsonify(swap.serialize()), 201
+
+
+@bp.route('/swap/<int:swap_id>/accept', methods=['POST'])
+@jwt_required()
+def accept_swap(swap_id):
+    swap = SwapRequest.query.get_or_404(swap_id)
+    current_user_id = get_jwt_identity()
+    if swap.owner_id != current_user_id:
+        return jsonify({'error': 'Only task owner can accept'}), 403
+    task = swap.task
+    swap.status = 'accepted'
+    task.assigned_to = swap.requester_id
+    db.session.commit()
+    return jsonify(swap.serialize())
+
+
+@bp.route('/swap/<int:swap_id>/reject', methods=['POST'])
+@jwt_required()
+def reject_swap(swap_id):
+    swap = SwapRequest.query.get_or_404(swap_id)
+    current_user_id = get_jwt_identity()
+    if swap.owner_id != current_user_id:
+        return jsonify({'error': 'Only task owner can reject'}), 403
+    swap.status = 'rejected'
+    db.session.commit()
+    return jsonify(swap.serialize())
+
+
+# -----------------------------
+# Inbox / outbox
+# -----------------------------
+def _swap_page(column, value, default_status=None):
+    """Keyset page, newest first: ?cursor=<last id seen>&limit=N.
+
+    With ?include_archived=1 the archive is paged the same way and the two
+    pages are merged by id.
+    """
+    cursor = request.args.get('cursor', type=int)
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    status = request.args.get('status', default_status)
+
+    models = [SwapRequest]
+    if include_archived(request.args):
+        models.append(SwapRequestArchive)
+    swaps = []
+    for model in models:
+        query = model.query.filter(getattr(model, column) == value)
+        if status:
+            query = query.filter(model.status == status)
+        if cursor:
+            query = query.filter(model.id < cursor)
+        swaps += query.order_by(model.id.desc()).limit(limit).all()
+    swaps = sorted(swaps, key=lambda s: s.id, reverse=True)[:limit]
+
+    return jsonify({
+        'items': [s.serialize_compact() for s in swaps],
+        'next_cursor': swaps[-1].id if len(swaps) == limit else None,
+    })
+
+
+@bp.route('/swaps/incoming', methods=['GET'])
+@jwt_required()
+def incoming_swaps():
+    """Requests on tasks I own; pending only unless ?status= is given."""
+    return _swap_page('owner_id', get_jwt_identity(), default_status='pending')
+
+
+@bp.route('/swaps/outgoing', methods=['GET'])
+@jwt_required()
+def outgoing_swaps():
+    """Requests I made."""
+    return _swap_page('requester_id', get_jwt_identity())
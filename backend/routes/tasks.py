@@ -0,0 +1,158 @@
+from flask import Blueprint, abort, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from extensions import db
+from facets import facet_counts
+from idempotency import idempotent
+from archive import find_task, include_archived
+from models import User, Task, TaskArchive
+from search import search_tasks
+
+bp = Blueprint('tasks', __name__)
+
+
+# -----------------------------
+# Task Routes
+# -----------------------------
+@bp.route('/tasks', methods=['POST'])
+@jwt_required()
+@idempotent
+def create_task():
+    data = request.get_json()
+    current_user_id = get_jwt_identity()
+    task = Task(
+        title=data['title'],
+        description=data.get('description', ''),
+        category=data.get('category', ''),
+        created_by=current_user_id
+    )
+    db.session.add(task)
+    db.session.commit()
+    return jsonify(task.serialize()), 201
+
+
+@bp.route('/tasks', methods=['GET'])
+@jwt_required()
+def list_tasks():
+    current_user = User.query.get(get_jwt_identity())
+    models = [Task, TaskArchive] if include_archived(request.args) else [Task]
+    tasks = []
+    for model in models:
+        if current_user.is_admin():
+            tasks += model.query.all()
+        else:
+            tasks += model.query.filter(
+                (model.created_by == current_user.id) | (model.assigned_to == current_user.id)
+            ).all()
+    return jsonify([t.serialize() for t in tasks])
+
+
+BROWSE_STATUSES = ('open', 'assigned', 'completed', 'expired')
+
+
+@bp.route('/tasks/browse', methods=['GET'])
+@jwt_required()
+def browse():
+    """Page of tasks plus facet counts.
+
+    ?category=&status=&assigned=true|false&cursor=<last id seen>&limit=
+    status defaults to open; other statuses are admin only.
+    """
+    current_user = User.query.get(get_jwt_identity())
+    status = request.args.get('status', 'open')
+    if status not in BROWSE_STATUSES:
+        return jsonify({'error': f'status must be one of {", ".join(BROWSE_STATUSES)}'}), 400
+    if status != 'open' and not current_user.is_admin():
+        return jsonify({'error': 'Access denied'}), 403
+    category = request.args.get('category')
+    assigned = request.args.get('assigned')
+    if assigned is not None:
+        assigned = assigned.lower() in ('1', 'true', 'yes')
+    cursor = request.args.get('cursor', type=int)
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+
+    query = Task.query.filter(Task.status == status)
+    if category == '':
+        # The '' facet counts tasks without a category too
+        query = query.filter((Task.category == '') | Task.category.is_(None))
+    elif category is not None:
+        query = query.filter(Task.category == category)
+    if assigned is not None:
+        query = query.filter(Task.assigned_to.isnot(None) if assigned else Task.assigned_to.is_(None))
+    if cursor:
+        query = query.filter(Task.id < cursor)
+    tasks = query.order_by(Task.id.desc()).limit(limit).all()
+
+    return jsonify({
+        'items': [t.serialize() for t in tasks],
+        'next_cursor': tasks[-1].id if len(tasks) == limit else None,
+        'facets': facet_counts(category, status, assigned),
+    })
+
+
+@bp.route('/tasks/search', methods=['GET'])
+@jwt_required()
+def search():
+    """Relevance-ranked search: ?q=&category=&status=&cursor=&limit="""
+    q = (request.args.get('q') or '').strip()
+    if not q:
+        return jsonify({'error': 'q is required'}), 400
+    current_user = User.query.get(get_jwt_identity())
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    try:
+        results, next_cursor = search_tasks(
+            q,
+            user=None if current_user.is_admin() else current_user,
+            category=request.args.get('category'),
+            status=request.args.get('status'),
+            cursor=request.args.get('cursor'),
+            limit=limit,
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    return jsonify({
+        'items': [dict(task.serialize(), score=score, snippet=snippet)
+                  for task, score, snippet in results],
+        'next_cursor': next_cursor,
+    })
+
+
+@bp.route('/tasks/<int:task_id>', methods=['GET'])
+@jwt_required()
+def get_task(task_id):
+    task = find_task(task_id)
+    if task is None:
+        abort(404)
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user.is_admin() and current_user.id not in [task.created_by, task.assigned_to]:
+        return jsonify({'error': 'Access denied'}), 403
+    return jsonify(task.serialize())
+
+
+@bp.route('/tasks/<int:task_id>', methods=['PUT'])
+@jwt_required()
+def update_task(task_id):
+    task = Task.query.get_or_404(task_id)
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user.is_admin() and task.created_by != current_user.id:
+        return jsonify({'error': 'Access denied'}), 403
+
+    data = request.get_json()
+    for field in ['title', 'description', 'status', 'assigned_to', 'category']:
+        if field in data:
+            setattr(task, field, data[field])
+    db.session.commit()
+    return jsonify(task.serialize())
+
+
+@bp.route('/tasks/<int:task_id>', methods=['DELETE'])
+@jwt_required()
+def delete_task(task_id):
+    task = Task.query.get_or_404(task_id)
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user.is_admin() and task.created_by != current_user.id:
+        return jsonify({'error': 'Access denied'}), 403
+
+    db.session.delete(task)
+    db.session.commit()
+    return jsonify({'message': 'Task deleted'})
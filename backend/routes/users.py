@@ -0,0 +1,37 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from models import User
+
+bp = Blueprint('users', __name__)
+
+
+# -----------------------------
+# User Routes
+# -----------------------------
+@bp.route('/profile/<int:user_id>', methods=['GET'])
+@jwt_required()
+def get_profile(user_id):
+    current_user_id = get_jwt_identity()
+    user = User.query.filter_by(id=user_id, deleted_at=None).first_or_404()
+    if current_user_id != user.id and not User.query.get(current_user_id).is_admin():
+        return jsonify({'error': 'Access denied'}), 403
+    return jsonify(user.serialize())
+
+
+@bp.route('/users', methods=['GET'])
+@jwt_required()
+def list_users():
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user.is_admin():
+        return jsonify({'error': 'Admin access required'}), 403
+
+    name = request.args.get('name')
+    skill = request.args.get('skill')
+    query = User.query.filter(User.deleted_at.is_(None))
+    if name:
+        query = query.filter(User.name.ilike(f'%{name}%'))
+    if skill:
+        query = query.filter(User.skills.ilike(f'%{skill}%'))
+    users = query.all()
+    return jsonify([u.serialize() for u in users])
@@ -0,0 +1,149 @@
+# backend/search.py
+# Ranked full-text search over task titles and descriptions.
+#
+# PostgreSQL: a generated tsvector column (title weighted above description)
+# with a GIN index; the database keeps it current on every write.
+# SQLite: an external-content FTS5 table kept in sync by triggers.
+# Both are created with the task table (create_all) and by migration.
+import base64
+import re
+
+from sqlalchemy import DDL, event, text
+
+from extensions import db
+from models import Task
+
+PG_DDL = [
+    "ALTER TABLE task ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED",
+    "CREATE INDEX ix_task_search_vector ON task USING GIN (search_vector)",
+]
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE task_fts USING fts5("
+    "title, description, content='task', content_rowid='id')",
+    "CREATE TRIGGER task_fts_ai AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER task_fts_ad AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER task_fts_au AFTER UPDATE OF title, description ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO task_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+]
+
+for statement in PG_DDL:
+    event.listen(Task.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+for statement in SQLITE_DDL:
+    event.listen(Task.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Task.__table__, 'before_drop',
+             DDL("DROP TABLE IF EXISTS task_fts").execute_if(dialect='sqlite'))
+
+
+# -----------------------------
+# Cursor
+# -----------------------------
+def encode_cursor(score, task_id):
+    return base64.urlsafe_b64encode(f'{score!r}:{task_id}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(score, id) from an opaque cursor; raises ValueError if malformed."""
+    score, _, task_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition(':')
+    return float(score), int(task_id)
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+def _fts5_query(q):
+    # Quote every term so user input can't use FTS5 query syntax
+    terms = re.findall(r'\w+', q)
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def _filters(user, category, status):
+    clauses, params = [], {}
+    if user is not None:
+        clauses.append("(task.status = 'open' OR task.created_by = :uid OR task.assigned_to = :uid)")
+        params['uid'] = user.id
+    if category:
+        clauses.append("task.category = :category")
+        params['category'] = category
+    if status:
+        clauses.append("task.status = :status")
+        params['status'] = status
+    return clauses, params
+
+
+def _postgresql(q, clauses, params, after, limit):
+    # ts_headline is expensive, so it only runs on the page being returned.
+    # ts_rank_cd is a float4; widen it so the float8 cursor compares exactly.
+    keyset = "AND (score < :after_score OR (score = :after_score AND id < :after_id))" if after else ""
+    sql = f"""
+        SELECT id, score, ts_headline('english', coalesce(description, title), query,
+               'StartSel=<mark>, StopSel=</mark>, MaxFragments=1, MaxWords=20, MinWords=5') AS snippet
+        FROM (
+            SELECT task.id, task.description, task.title, query,
+                   ts_rank_cd(task.search_vector, query)::float8 AS score
+            FROM task, websearch_to_tsquery('english', :q) AS query
+            WHERE task.search_vector @@ query {''.join(' AND ' + c for c in clauses)}
+        ) AS hits
+        WHERE TRUE {keyset}
+        ORDER BY score DESC, id DESC
+        LIMIT :limit
+    """
+    params = dict(params, q=q, limit=limit)
+    return sql, params
+
+
+def _sqlite(q, clauses, params, after, limit):
+    # bm25() is lower-is-better; negate it so both backends sort descending.
+    # Column weights rank title matches above description matches.
+    keyset = "AND (score < :after_score OR (score = :after_score AND id < :after_id))" if after else ""
+    sql = f"""
+        SELECT id, score, snippet FROM (
+            SELECT task.id AS id, -bm25(task_fts, 10.0, 1.0) AS score,
+                   snippet(task_fts, -1, '<mark>', '</mark>', '…', 12) AS snippet
+            FROM task_fts JOIN task ON task.id = task_fts.rowid
+            WHERE task_fts MATCH :q {''.join(' AND ' + c for c in clauses)}
+        )
+        WHERE 1 {keyset}
+        ORDER BY score DESC, id DESC
+        LIMIT :limit
+    """
+    params = dict(params, q=_fts5_query(q), limit=limit)
+    return sql, params
+
+
+BACKENDS = {'postgresql': _postgresql, 'sqlite': _sqlite}
+
+
+def search_tasks(q, user=None, category=None, status=None, cursor=None, limit=20):
+    """Rank tasks matching ``q``. ``user`` restricts results to open tasks
+    plus the user's own and assigned ones (None = admin, everything).
+
+    Returns ([(task, score, snippet)], next_cursor).
+    """
+    dialect = db.session.get_bind().dialect.name
+    backend = BACKENDS.get(dialect)
+    if backend is None:
+        raise RuntimeError(f'Task search is not supported on {dialect}')
+    if dialect == 'sqlite' and not _fts5_query(q):
+        return [], None
+
+    clauses, params = _filters(user, category, status)
+    after = decode_cursor(cursor) if cursor else None
+    if after:
+        params['after_score'], params['after_id'] = after
+    sql, params = backend(q, clauses, params, after, limit)
+    hits = db.session.execute(text(sql), params).all()
+
+    tasks = {t.id: t for t in Task.query.filter(Task.id.in_([h.id for h in hits]))}
+    results = [(tasks[h.id], h.score, h.snippet) for h in hits if h.id in tasks]
+    next_cursor = encode_cursor(hits[-1].score, hits[-1].id) if len(hits) == limit else None
+    return results, next_cursor
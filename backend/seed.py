@@ -1,9 +1,11 @@
-from app import app, db
+from app import create_app
+from extensions import db
 from models import User, Task, SwapRequest, Review
 from werkzeug.security import generate_password_hash
 from datetime import datetime
 
 def seed():
+    app = create_app()
     with app.app_context():
         # ⚠️ Clears the database
         db.drop_all()
@@ -0,0 +1,285 @@
+# backend/snapshot.py
+# Dataset snapshots for offline analytics.
+#
+# Writes users, tasks, swaps and reviews as one file each: Parquet or Arrow
+# IPC (zstd) when pyarrow is installed, gzipped NDJSON otherwise. Rows are
+# read in keyset batches of SNAPSHOT_BATCH_SIZE and encoded as they arrive,
+# so neither the database nor the writer ever holds a whole table.
+#
+# Incremental snapshots take the rows whose key column (updated_at, or
+# created_at for reviews, which are never edited) falls in [since, until).
+# `until` is written to the manifest and is the next run's `since`. A row
+# changed twice between runs is exported once; a row changed again later
+# shows up again, so consumers keep the last copy per id.
+from datetime import datetime, timedelta
+import gzip
+import json
+import os
+
+from sqlalchemy import String, literal, select, tuple_, type_coerce
+
+from extensions import db
+from models import (
+    User, Task, SwapRequest, Review, TaskArchive, SwapRequestArchive, ReviewArchive,
+)
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# name: (model, archive model, key column, excluded columns)
+TABLES = {
+    'users': (User, None, 'updated_at', ('password_hash',)),
+    'tasks': (Task, TaskArchive, 'updated_at', ()),
+    'swaps': (SwapRequest, SwapRequestArchive, 'updated_at', ()),
+    'reviews': (Review, ReviewArchive, 'created_at', ()),
+}
+
+FORMATS = ('parquet', 'arrow', 'ndjson')
+EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow', 'ndjson': '.ndjson.gz'}
+MIMETYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file',
+    'ndjson': 'application/gzip',
+}
+
+
+def default_format():
+    return 'parquet' if pyarrow is not None else 'ndjson'
+
+
+def available(fmt):
+    return fmt == 'ndjson' or (fmt in FORMATS and pyarrow is not None)
+
+
+def columns(name):
+    model, _, _, excluded = TABLES[name]
+    return [c for c in model.__table__.columns if c.name not in excluded]
+
+
+def window_end(settle_seconds=0):
+    # Leave transactions still in flight a moment to commit: a row stamped
+    # just before `until` but committed after it would be missed by both
+    # this snapshot and the next.
+    return datetime.utcnow() - timedelta(seconds=settle_seconds)
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def _batches(table, cols, key, since, until, batch_size):
+    id_col, key_col = table.c.id, table.c[key]
+    query = select(*[table.c[c.name] for c in cols])
+    if until is not None:
+        query = query.where(key_col < until)
+    if since is None:
+        # Full snapshot: walk the primary key
+        query = query.order_by(id_col)
+    else:
+        # Incremental: range scan on (key, id). The cursor is the key as
+        # stored, not as parsed: SQLite keeps func.now() defaults without
+        # microseconds, which a datetime bind would never compare equal to.
+        raw_key = type_coerce(key_col, String)
+        query = query.add_columns(raw_key.label('_cursor')) \
+            .where(key_col >= since).order_by(key_col, id_col)
+
+    last = None
+    while True:
+        page = query
+        if last is not None:
+            if since is None:
+                page = page.where(id_col > last['id'])
+            else:
+                # A row-value comparison, so the (key, id) index seeks
+                # straight to the cursor
+                page = page.where(tuple_(raw_key, id_col)
+                                  > tuple_(literal(last['_cursor'], String), last['id']))
+        rows = [dict(row) for row in db.session.execute(page.limit(batch_size)).mappings()]
+        if not rows:
+            return
+        last = rows[-1]
+        if since is not None:
+            last = {'id': last['id'], '_cursor': last['_cursor']}
+            for row in rows:
+                del row['_cursor']
+        yield rows
+
+
+def batches(name, since=None, until=None, batch_size=5000, include_archived=False):
+    """Yield the rows of one table as lists of dicts, batch_size at a time."""
+    model, archive, key, _ = TABLES[name]
+    cols = columns(name)
+    sources = [model.__table__]
+    if include_archived and archive is not None:
+        # The archive tables carry the same columns (plus archived_at)
+        sources.append(archive.__table__)
+    try:
+        for table in sources:
+            yield from _batches(table, cols, key, since, until, batch_size)
+    finally:
+        # End the read transaction between tables and when abandoned
+        db.session.rollback()
+
+
+# -----------------------------
+# Writers
+# -----------------------------
+def _arrow_type(column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return pyarrow.string()
+    if python_type is bool:
+        return pyarrow.bool_()
+    if python_type is int:
+        return pyarrow.int64()
+    if python_type is float:
+        return pyarrow.float64()
+    if python_type is datetime:
+        return pyarrow.timestamp('us')
+    return pyarrow.string()
+
+
+def _arrow_schema(cols):
+    return pyarrow.schema([pyarrow.field(c.name, _arrow_type(c), nullable=True) for c in cols])
+
+
+class _ParquetWriter:
+    def __init__(self, sink, cols):
+        self.schema = _arrow_schema(cols)
+        self.writer = pyarrow.parquet.ParquetWriter(sink, self.schema, compression='zstd')
+
+    def write(self, rows):
+        # One row group per batch
+        self.writer.write_table(pyarrow.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class _ArrowWriter:
+    def __init__(self, sink, cols):
+        self.schema = _arrow_schema(cols)
+        self.writer = pyarrow.ipc.new_file(
+            sink, self.schema, options=pyarrow.ipc.IpcWriteOptions(compression='zstd'))
+
+    def write(self, rows):
+        self.writer.write_batch(pyarrow.RecordBatch.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class _NdjsonWriter:
+    def __init__(self, sink, cols):
+        self.file = gzip.GzipFile(fileobj=sink, mode='wb', compresslevel=6)
+
+    def write(self, rows):
+        self.file.write(''.join(
+            json.dumps(row, default=_json_default, separators=(',', ':')) + '\n'
+            for row in rows).encode())
+
+    def close(self):
+        self.file.close()
+
+
+WRITERS = {'parquet': _ParquetWriter, 'arrow': _ArrowWriter, 'ndjson': _NdjsonWriter}
+
+
+class _Chunks:
+    """Write-only file object that collects what the writer produces until
+    the caller drains it. Lets a response stream a file batch by batch."""
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self.parts = b''.join(self.parts), []
+        return data
+
+
+def _write(fmt, sink, name, **options):
+    """Encode one table into sink. Yields the row count after each batch."""
+    writer = WRITERS[fmt](sink, columns(name))
+    for rows in batches(name, **options):
+        writer.write(rows)
+        yield len(rows)
+    writer.close()
+
+
+def stream(name, fmt, **options):
+    """Yield one table's snapshot file as byte chunks, one per batch."""
+    sink = _Chunks()
+    for _ in _write(fmt, sink, name, **options):
+        data = sink.drain()
+        if data:
+            yield data
+    yield sink.drain()
+
+
+def export(directory, fmt=None, since=None, until=None, batch_size=5000,
+           include_archived=False, tables=None):
+    """Write every table (or `tables`) under directory plus manifest.json.
+    Returns the manifest."""
+    fmt = fmt or default_format()
+    until = until or window_end()
+    os.makedirs(directory, exist_ok=True)
+    manifest = {
+        'created_at': datetime.utcnow().isoformat(),
+        'format': fmt,
+        'since': since.isoformat() if since else None,
+        'until': until.isoformat(),
+        'tables': {},
+    }
+    for name in tables or TABLES:
+        filename = name + EXTENSIONS[fmt]
+        path = os.path.join(directory, filename)
+        rows = 0
+        # Written under a temporary name so a failed run leaves no partial file
+        try:
+            with open(path + '.tmp', 'wb') as sink:
+                for count in _write(fmt, sink, name, since=since, until=until,
+                                    batch_size=batch_size, include_archived=include_archived):
+                    rows += count
+        except BaseException:
+            os.remove(path + '.tmp')
+            raise
+        os.replace(path + '.tmp', path)
+        manifest['tables'][name] = {'file': filename, 'rows': rows, 'key': TABLES[name][2]}
+
+    with open(os.path.join(directory, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
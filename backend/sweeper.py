@@ -0,0 +1,138 @@
+# backend/sweeper.py
+# Expires stale rows so they stop weighing on the status filters:
+#
+# - pending swaps whose task is no longer open (assigned, completed or
+#   expired) - nobody can accept them any more
+# - pending swaps older than SWEEP_SWAP_MAX_AGE_DAYS
+# - open, unassigned tasks not updated for SWEEP_TASK_IDLE_DAYS
+#
+# Rows are claimed in batches of SWEEP_BATCH_SIZE (FOR UPDATE SKIP LOCKED on
+# PostgreSQL, so a sweep never waits on a request holding a row) and updated
+# with one statement per batch, each batch in its own short transaction.
+# Runs from `flask sweep` or, with SWEEP_INTERVAL set, on each worker's
+# background thread.
+from datetime import datetime, timedelta
+import logging
+import os
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import select, update, func
+
+import background
+from changes import record
+from extensions import db, metrics
+from models import Task, SwapRequest
+
+logger = logging.getLogger(__name__)
+
+
+def _policies(now, swap_max_age, task_idle):
+    """(name, model, condition, audience columns), in the order they run.
+    Tasks go first so the swaps on a task that just expired follow in the
+    same sweep."""
+    task_not_open = select(Task.id).where(Task.id == SwapRequest.task_id, Task.status != 'open')
+    return [
+        ('idle_tasks', Task,
+         (Task.status == 'open') & Task.assigned_to.is_(None)
+         & (Task.updated_at < now - task_idle),
+         (Task.created_by, Task.assigned_to)),
+        ('superseded_swaps', SwapRequest,
+         (SwapRequest.status == 'pending') & task_not_open.exists(),
+         (SwapRequest.requester_id, SwapRequest.owner_id)),
+        ('stale_swaps', SwapRequest,
+         (SwapRequest.status == 'pending') & (SwapRequest.created_at < now - swap_max_age),
+         (SwapRequest.requester_id, SwapRequest.owner_id)),
+    ]
+
+
+def _expire(model, condition, audience, batch_size):
+    entity = 'task' if model is Task else 'swap'
+    expired = 0
+    while True:
+        ids = db.session.scalars(
+            select(model.id).where(condition).order_by(model.id)
+            .limit(batch_size).with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            return expired
+        # Re-check the condition: a request may have changed a row since
+        values = {'status': 'expired'}
+        if model is Task:
+            values['updated_at'] = datetime.utcnow()
+        rows = db.session.execute(
+            update(model).where(model.id.in_(ids), condition).values(**values)
+            .returning(model.id, *audience)
+            .execution_options(synchronize_session=False)
+        ).all()
+        record(db.session,
+               [(entity, row[0], 'update', set(row[1:])) for row in rows])
+        db.session.commit()
+        expired += len(rows)
+
+
+def sweep(swap_max_age_days=30, task_idle_days=180, batch_size=500, dry_run=False):
+    """Run every policy. Returns {policy: rows expired (or due, if dry_run)}."""
+    now = datetime.utcnow()
+    counts = {}
+    for name, model, condition, audience in _policies(
+            now, timedelta(days=swap_max_age_days), timedelta(days=task_idle_days)):
+        if dry_run:
+            counts[name] = db.session.scalar(select(func.count()).select_from(model).where(condition))
+        else:
+            counts[name] = _expire(model, condition, audience, batch_size)
+            if counts[name]:
+                metrics.inc('sweeper_expired_total', counts[name], policy=name)
+    if dry_run:
+        db.session.rollback()
+    return counts
+
+
+def sweep_from_config(dry_run=False):
+    config = current_app.config
+    return sweep(config['SWEEP_SWAP_MAX_AGE_DAYS'], config['SWEEP_TASK_IDLE_DAYS'],
+                 config['SWEEP_BATCH_SIZE'], dry_run)
+
+
+# -----------------------------
+# In-process schedule
+# -----------------------------
+_started_pid = None
+_lock = threading.Lock()
+
+
+def _schedule(app, interval):
+    while True:
+        time.sleep(interval)
+        future = background.submit(app, sweep_from_config)
+        try:
+            counts = future.result()
+        except Exception:
+            continue  # already logged by background.submit
+        if any(counts.values()):
+            logger.info('Sweep expired %s', counts)
+
+
+def start(app):
+    """Start this process's sweep timer if it isn't running yet. Called on
+    each request when SWEEP_INTERVAL is set, so every forked worker gets
+    its own timer (threads do not survive the fork)."""
+    global _started_pid
+    if _started_pid == os.getpid():
+        return
+    with _lock:
+        if _started_pid == os.getpid():
+            return
+        _started_pid = os.getpid()
+        threading.Thread(target=_schedule, args=(app, app.config['SWEEP_INTERVAL']),
+                         name='sweeper', daemon=True).start()
+
+
+def init_app(app):
+    if not app.config['SWEEP_INTERVAL']:
+        return
+
+    @app.before_request
+    def _start_sweeper():
+        start(app)
@@ -0,0 +1,47 @@
+# backend/tests/conftest.py
+# Each test gets a fresh app on its own SQLite file, with an admin (a@x)
+# and two users (b@x, c@x) whose password is "pw".
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from config import Config
+from extensions import db
+from models import User
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "test.db"}'
+        METRICS_DIR = str(tmp_path / 'metrics')
+        PROFILING_DIR = str(tmp_path / 'profiles')
+        PURGE_IN_BACKGROUND = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(name=name, email=email, role=role, password_hash=generate_password_hash('pw'))
+            for name, email, role in [('admin', 'a@x', 'admin'), ('bob', 'b@x', 'user'),
+                                      ('cat', 'c@x', 'user')]
+        ])
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """login(email) -> Authorization header for that user."""
+    def login(email):
+        response = client.post('/login', json={'email': email, 'password': 'pw'})
+        return {'Authorization': 'Bearer ' + response.json['access_token']}
+    return login
@@ -0,0 +1,57 @@
+# backend/tests/test_batch.py
+from flask_jwt_extended import JWTManager
+
+
+def test_reads_and_writes_keep_their_order(client, login):
+    bob = login('b@x')
+    response = client.post('/batch', headers=bob, json={'requests': [
+        {'method': 'POST', 'path': '/tasks', 'body': {'title': 'first'}},
+        {'method': 'GET', 'path': '/tasks'},
+        {'method': 'POST', 'path': '/tasks', 'body': {'title': 'second'}},
+        {'method': 'GET', 'path': '/tasks'},
+    ]})
+    assert response.status_code == 200
+    created, before, _, after = response.json
+    assert created['status'] == 201
+    assert [t['title'] for t in before['body']] == ['first']
+    assert sorted(t['title'] for t in after['body']) == ['first', 'second']
+
+
+def test_concurrent_reads_are_not_shed(app, client, login):
+    # Sub-requests run inside the /batch request's admission slot; counting
+    # them again would push an idle worker past the shed thresholds.
+    assert app.config['SERVE_THREADS'] == 4
+    bob = login('b@x')
+    response = client.post('/batch', headers=bob, json={
+        'requests': [{'method': 'GET', 'path': '/tasks'}] * 4})
+    assert [r['status'] for r in response.json] == [200] * 4
+    assert app.extensions['ratelimit'].stats()['shed'] == 0
+
+
+def test_token_is_verified_once(client, login, monkeypatch):
+    bob = login('b@x')
+    calls = []
+    decode = JWTManager._decode_jwt_from_config
+
+    def counting(self, *args, **kwargs):
+        calls.append(1)
+        return decode(self, *args, **kwargs)
+
+    monkeypatch.setattr(JWTManager, '_decode_jwt_from_config', counting)
+    response = client.post('/batch', headers=bob, json={
+        'requests': [{'method': 'GET', 'path': '/tasks'}] * 3})
+    assert [r['status'] for r in response.json] == [200] * 3
+    assert len(calls) == 1
+
+
+def test_sub_requests_still_check_the_route(client, login):
+    bob = login('b@x')
+    response = client.post('/batch', headers=bob, json={
+        'requests': [{'method': 'GET', 'path': '/admin/users'}]})
+    assert response.json[0]['status'] == 403
+
+
+def test_nested_batches_are_refused(client, login):
+    response = client.post('/batch', headers=login('b@x'), json={
+        'requests': [{'method': 'POST', 'path': '/batch', 'body': {}}]})
+    assert response.status_code == 400
@@ -0,0 +1,62 @@
+# backend/tests/test_browse.py
+from sqlalchemy import text
+
+import facets
+from extensions import db
+
+
+def _tasks(client, headers):
+    ids = {}
+    for title, category in [('a', 'chores'), ('b', 'chores'), ('c', 'garden'),
+                            ('d', 'garden'), ('e', None)]:
+        ids[title] = client.post('/tasks', headers=headers,
+                                 json={'title': title, 'category': category}).json['id']
+    return ids
+
+
+def test_paging_covers_every_task_once(client, login):
+    bob = login('b@x')
+    ids = _tasks(client, bob)
+    seen, cursor = [], None
+    while True:
+        page = client.get('/tasks/browse?limit=2' + (f'&cursor={cursor}' if cursor else ''),
+                          headers=bob).json
+        seen += [t['id'] for t in page['items']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == sorted(ids.values(), reverse=True)
+
+    garden = client.get('/tasks/browse?category=garden&limit=1', headers=bob).json
+    assert [t['id'] for t in garden['items']] == [ids['d']]
+    after = client.get(f"/tasks/browse?category=garden&limit=1&cursor={garden['next_cursor']}",
+                       headers=bob).json
+    assert [t['id'] for t in after['items']] == [ids['c']]
+
+
+def test_facet_counts_survive_a_fold(app, client, login):
+    bob, admin = login('b@x'), login('a@x')
+    ids = _tasks(client, bob)
+    client.put(f"/tasks/{ids['a']}", headers=bob, json={'category': 'garden'})
+    client.put(f"/tasks/{ids['c']}", headers=bob, json={'assigned_to': 3})
+    client.put(f"/tasks/{ids['b']}", headers=bob, json={'status': 'completed'})
+    client.delete(f"/tasks/{ids['d']}", headers=bob)
+
+    # Each facet ignores its own filter, so status shows what else exists
+    expected = {'category': {'garden': 2, '': 1},
+                'status': {'open': 3, 'completed': 1},
+                'assigned': {'assigned': 1, 'unassigned': 2}}
+    assert client.get('/tasks/browse', headers=bob).json['facets'] == expected
+
+    with app.app_context():
+        facets.fold()
+        assert db.session.execute(text('SELECT count(*) FROM task_facet_delta')).scalar() == 0
+    assert client.get('/tasks/browse', headers=bob).json['facets'] == expected
+
+    with app.app_context():
+        facets.rebuild()
+    assert client.get('/tasks/browse', headers=bob).json['facets'] == expected
+    # Other facets are counted under the active filter only
+    completed = client.get('/tasks/browse?status=completed', headers=admin).json['facets']
+    assert completed['category'] == {'chores': 1}
+    assert completed['status'] == {'open': 3, 'completed': 1}
@@ -0,0 +1,43 @@
+# backend/tests/test_changes.py
+from extensions import db
+from models import ChangeLog, Task
+
+
+def _feed(client, headers, since=0):
+    response = client.get(f'/changes?since={since}', headers=headers)
+    assert response.status_code == 200
+    return [(c['entity'], c['id'], c['op']) for c in response.json['changes']]
+
+
+def test_cascaded_deletes_reach_both_sides(app, client, login):
+    app.config['CHANGES_SETTLE_SECONDS'] = 0
+    bob, cat = login('b@x'), login('c@x')
+    task = client.post('/tasks', headers=bob, json={'title': 'fence'}).json['id']
+    swap = client.post('/swap', headers=cat, json={'task_id': task}).json['id']
+    review = client.post('/reviews', headers=cat, json={
+        'task_id': task, 'reviewee_id': 2, 'rating': 4}).json['id']
+    cursor = client.get('/changes', headers=cat).json['cursor']
+
+    client.delete(f'/tasks/{task}', headers=bob)
+
+    deleted = {('task', task, 'delete'), ('swap', swap, 'delete'), ('review', review, 'delete')}
+    assert set(_feed(client, bob, cursor)) == deleted
+    # The requester only ever saw the swap and review, not the task
+    assert set(_feed(client, cat, cursor)) == deleted - {('task', task, 'delete')}
+
+
+def test_entries_are_written_at_commit(app):
+    with app.app_context():
+        task = Task(title='late', description='', created_by=2)
+        db.session.add(task)
+        db.session.flush()
+        # The change's cursor is not taken while the transaction runs on
+        assert db.session.query(ChangeLog).count() == 0
+        db.session.commit()
+        assert [(c.entity, c.entity_id, c.op) for c in ChangeLog.query] == [('task', task.id, 'insert')]
+
+        db.session.add(Task(title='never', description='', created_by=2))
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+        assert db.session.query(ChangeLog).count() == 1
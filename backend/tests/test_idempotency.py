@@ -0,0 +1,64 @@
+# backend/tests/test_idempotency.py
+from datetime import datetime, timedelta
+
+from extensions import db
+from models import IdempotencyKey, Task
+
+
+def _post(client, headers, key, body):
+    return client.post('/tasks', headers=dict(headers, **{'Idempotency-Key': key}), json=body)
+
+
+def test_retry_replays_the_first_response(app, client, login):
+    bob = login('b@x')
+    first = _post(client, bob, 'k1', {'title': 'paint'})
+    again = _post(client, bob, 'k1', {'title': 'paint'})
+    assert first.status_code == again.status_code == 201
+    assert again.json == first.json
+    assert again.headers['Idempotent-Replayed'] == 'true'
+    # Keys belong to the caller
+    assert _post(client, login('c@x'), 'k1', {'title': 'paint'}).json['id'] != first.json['id']
+    with app.app_context():
+        assert Task.query.filter_by(title='paint').count() == 2
+
+
+def test_reused_key_with_another_body(client, login):
+    bob = login('b@x')
+    _post(client, bob, 'k1', {'title': 'paint'})
+    response = _post(client, bob, 'k1', {'title': 'sand'})
+    assert response.status_code == 422
+
+
+def test_key_without_a_stored_response(app, client, login):
+    bob = login('b@x')
+    first = _post(client, bob, 'k1', {'title': 'paint'})
+    with app.app_context():
+        # As if the worker died between committing the view and storing its answer
+        row = db.session.get(IdempotencyKey, (2, 'k1'))
+        row.status_code = row.response_body = row.mimetype = None
+        db.session.commit()
+
+    response = _post(client, bob, 'k1', {'title': 'paint'})
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+    assert 'in progress' in response.json['error']
+
+    with app.app_context():
+        db.session.get(IdempotencyKey, (2, 'k1')).locked_at = datetime.utcnow() - timedelta(hours=1)
+        db.session.commit()
+    response = _post(client, bob, 'k1', {'title': 'paint'})
+    assert response.status_code == 409
+    assert 'not saved' in response.json['error']
+    with app.app_context():
+        assert [t.id for t in Task.query.filter_by(title='paint')] == [first.json['id']]
+
+
+def test_expired_key_is_free_again(app, client, login):
+    bob = login('b@x')
+    first = _post(client, bob, 'k1', {'title': 'paint'})
+    with app.app_context():
+        db.session.get(IdempotencyKey, (2, 'k1')).expires_at = datetime.utcnow()
+        db.session.commit()
+    second = _post(client, bob, 'k1', {'title': 'sand'})
+    assert second.status_code == 201
+    assert second.json['id'] != first.json['id']
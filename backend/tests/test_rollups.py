@@ -0,0 +1,62 @@
+# backend/tests/test_rollups.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, union_all
+
+import rollups
+from extensions import db
+from models import ActivityRollup, ActivityRollupDelta
+
+
+def _totals():
+    """{(metric, bucket, start, dimension): (count, total)} over both tables."""
+    parts = [select(m.metric, m.bucket, m.bucket_start, m.dimension, m.count, m.total)
+             for m in (ActivityRollup, ActivityRollupDelta)]
+    rows = union_all(*parts).subquery()
+    keys = (rows.c.metric, rows.c.bucket, rows.c.bucket_start, rows.c.dimension)
+    query = select(*keys, func.sum(rows.c.count), func.sum(rows.c.total)).group_by(*keys)
+    return {tuple(key): (count, round(total, 6))
+            for *key, count, total in db.session.execute(query) if count}
+
+
+def _activity(client, login):
+    bob, carol, admin = login('b@x'), login('c@x'), login('a@x')
+    ids = []
+    for category in ('chores', 'chores', 'garden'):
+        response = client.post('/tasks', headers=bob, json={'title': 'x', 'category': category})
+        ids.append(response.json['id'])
+    for task_id in ids:
+        swap = client.post('/swap', headers=carol, json={'task_id': task_id}).json
+        client.post(f"/swap/{swap['id']}/accept", headers=bob)
+        client.post('/reviews', headers=carol, json={
+            'task_id': task_id, 'reviewee_id': 2, 'rating': task_id + 2})
+    return ids, bob, carol, admin
+
+
+def test_deltas_match_a_backfill(app, client, login):
+    ids, bob, carol, admin = _activity(client, login)
+    client.put(f'/tasks/{ids[0]}', headers=bob, json={'category': 'garden'})
+    client.delete(f'/tasks/{ids[1]}', headers=bob)
+    client.delete('/admin/users/3', headers=admin)
+
+    with app.app_context():
+        incremental = _totals()
+        assert incremental[('tasks_created', 'day', rollups.truncate(datetime.utcnow(), 'day'),
+                            'garden')] == (2, 0.0)
+        rollups.fold()
+        assert db.session.query(ActivityRollupDelta).count() == 0
+        assert _totals() == incremental
+        rollups.backfill()
+        assert _totals() == incremental
+
+
+def test_series_reads_unfolded_deltas(app, client, login):
+    ids, bob, carol, admin = _activity(client, login)
+    with app.app_context():
+        now = datetime.utcnow()
+        window = (now - timedelta(days=1), now + timedelta(days=1))
+        before = rollups.series('review_rating', 'day', *window)
+        assert [(count, total) for _, count, total in before] == [(3, 12.0)]
+        rollups.fold()
+        assert rollups.series('review_rating', 'day', *window) == before
+        assert rollups.series('review_rating', 'day', *window, dimension='garden')[0][1:] == (1, 5.0)
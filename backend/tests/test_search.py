@@ -0,0 +1,30 @@
+# backend/tests/test_search.py
+
+
+def _pages(client, headers, url):
+    seen, cursor = [], None
+    while True:
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''), headers=headers)
+        assert response.status_code == 200
+        seen += [item['id'] for item in response.json['items']]
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            return seen
+
+
+def test_paging_through_tied_scores(client, login):
+    # Identical rows rank identically, so every page boundary falls on a tie
+    bob = login('b@x')
+    ids = [client.post('/tasks', headers=bob, json={'title': 'mow the lawn'}).json['id']
+           for _ in range(7)]
+    client.post('/tasks', headers=bob, json={'title': 'mow', 'description': 'lawn lawn lawn'})
+    client.post('/tasks', headers=bob, json={'title': 'water plants'})
+
+    seen = _pages(client, bob, '/tasks/search?q=lawn&limit=3')
+    assert len(seen) == len(set(seen)) == 8
+    assert [i for i in seen if i in ids] == sorted(ids, reverse=True)
+
+
+def test_bad_cursor(client, login):
+    response = client.get('/tasks/search?q=lawn&cursor=nope', headers=login('b@x'))
+    assert response.status_code == 400
@@ -0,0 +1,34 @@
+# backend/tests/test_startup.py
+# Worker boot must not pay for modules only a few admin endpoints use:
+# reports are mounted lazily, and the importer and snapshot code (with
+# pyarrow behind it) load on first call. Checked with -X importtime in a
+# fresh interpreter, since anything this process already imported would
+# hide a regression.
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFERRED = ('routes.reports', 'importer', 'snapshot', 'pyarrow')
+
+
+def _imported_modules():
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import wsgi'],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+    )
+    # "import time: self [us] | cumulative | <indented module name>"
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and line.count('|') == 2:
+            modules.add(line.rsplit('|', 1)[1].strip())
+    return modules
+
+
+def test_wsgi_import_defers_admin_only_modules():
+    modules = _imported_modules()
+    assert 'app' in modules
+    for name in DEFERRED:
+        loaded = sorted(m for m in modules if m == name or m.startswith(name + '.'))
+        assert not loaded, f'{name} imported at startup: {loaded}'
@@ -0,0 +1,21 @@
+# backend/tests/test_swaps.py
+from extensions import db
+from models import SwapRequest
+
+
+def test_only_the_swap_owner_accepts(app, client, login):
+    bob, cat = login('b@x'), login('c@x')
+    task = client.post('/tasks', headers=bob, json={'title': 'gutters'}).json['id']
+    swap = client.post('/swap', headers=cat, json={'task_id': task}).json['id']
+    assert client.post(f'/swap/{swap}/accept', headers=cat).status_code == 403
+
+    # The swap's owner decides, as in the inbox, even if it no longer
+    # matches the task's creator
+    with app.app_context():
+        db.session.get(SwapRequest, swap).owner_id = 3
+        db.session.commit()
+    assert [s['id'] for s in client.get('/swaps/incoming', headers=cat).json['items']] == [swap]
+    assert client.post(f'/swap/{swap}/accept', headers=bob).status_code == 403
+    response = client.post(f'/swap/{swap}/accept', headers=cat)
+    assert response.status_code == 200
+    assert response.json['status'] == 'accepted'
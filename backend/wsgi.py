@@ -0,0 +1,7 @@
+# backend/wsgi.py
+# Entry point for WSGI servers. Build the app once in the master process
+# (e.g. gunicorn --preload wsgi:app) so workers fork with every module
+# already imported; create_app() opens no database connections.
+from app import create_app
+
+app = create_app()